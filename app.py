@@ -1,32 +1,88 @@
+import time
+APP_IMPORT_STARTED = time.perf_counter()  # Cold-start timing, reported once the module has loaded
+
 from flask import Flask, render_template, redirect, url_for, request, session, flash, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from datetime import datetime, timedelta
-import psutil
 import requests
-from sqlalchemy import text
+from sqlalchemy import text, update, insert, bindparam
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 
 import json
+import base64
+import csv
+import hashlib
+import io
 import os
+import string
+import tempfile
+import threading
+import time as time_module
+import zlib
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-import time
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from apscheduler.schedulers.background import BackgroundScheduler
-from postmarker.core import PostmarkClient
+# APScheduler, postmarker and psutil are imported where they are used, so serverless
+# invocations that never start the scheduler or send email do not pay for them.
 
 
 load_dotenv()
 
+# Serverless deployments (Vercel routes every request to this module) get a fresh process per
+# cold start and may be frozen between requests, so they skip the scheduler and workers and
+# do not keep a connection pool around. They also never change the schema: run
+# `flask --app app migrate-db` against the database once per deploy, before the new code
+# serves traffic (a server-mode start applies the same migrations).
+SERVERLESS = os.getenv('SIGNAL_SERVERLESS', '1' if os.getenv('VERCEL') else '0') == '1'
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '10'))
+DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', '10'))
+
+def uses_transaction_pooler(database_uri):
+    """True when the URI points at an external transaction pooler (Supabase Supavisor / PgBouncer on 6543)"""
+    if not database_uri:
+        return False
+    try:
+        url = make_url(database_uri)
+    except Exception:
+        return False
+    return url.port == 6543 or 'pooler.supabase.com' in (url.host or '')
+
+def normalize_database_uri(database_uri):
+    """Pin bare postgres URIs (as Supabase hands them out) to psycopg2, the driver in requirements.txt:
+    newer SQLAlchemy defaults them to psycopg 3, and the tender store's COPY path uses psycopg2's copy_expert"""
+    if not database_uri:
+        return database_uri
+    try:
+        url = make_url(database_uri)
+    except Exception:
+        return database_uri
+    if url.drivername in ('postgres', 'postgresql'):
+        return url.set(drivername='postgresql+psycopg2').render_as_string(hide_password=False)
+    return database_uri
+
+def build_engine_options(database_uri, serverless=SERVERLESS):
+    """Engine options for the deployment: NullPool when the process is short-lived or an external
+    pooler already multiplexes connections, otherwise a local QueuePool for the long-lived server"""
+    if serverless or uses_transaction_pooler(database_uri):
+        return {
+            'poolclass': NullPool,  # Open per checkout, close on release; nothing idles in a frozen instance
+            'pool_pre_ping': False  # A brand-new connection does not need a liveness probe
+        }
+    return {
+        'pool_pre_ping': True,  # Test connections before use
+        'pool_recycle': 3600,   # Recycle connections every hour
+        'pool_timeout': 20,     # Connection timeout
+        'max_overflow': DATABASE_MAX_OVERFLOW,  # Maximum overflow connections
+        'pool_size': DATABASE_POOL_SIZE         # Connection pool size
+    }
+
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SUPABASE_DATABASE_URI')
+app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_uri(os.getenv('SUPABASE_DATABASE_URI'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,  # Test connections before use
-    'pool_recycle': 3600,   # Recycle connections every hour
-    'pool_timeout': 20,     # Connection timeout
-    'max_overflow': 10,     # Maximum overflow connections
-    'pool_size': 10         # Connection pool size
-}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SECRET_KEY'] = 'your_secret_key'
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
@@ -95,15 +151,186 @@ class Alert(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     keyword = db.Column(db.String(100), nullable=False)
     keyword_type = db.Column(db.String(100), nullable=True)
-    emails = db.Column(db.String(255), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref=db.backref('alerts', lazy=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_run_date = db.Column(db.DateTime)
+    schedule = db.Column(db.String(100))  # Cron expression, "every 6h" style interval or preset; NULL uses the default
+    next_run_at = db.Column(db.DateTime, index=True)  # UTC
+    run_status = db.Column(db.String(20))  # success, retrying, failed (retries exhausted) or invalid (schedule does not parse)
+    run_attempts = db.Column(db.Integer, nullable=False, default=0)  # Consecutive failed attempts
+    last_error = db.Column(db.Text)
+    next_retry_at = db.Column(db.DateTime)  # UTC; set while a failed alert is waiting to be retried
+    recipients = db.relationship('AlertRecipient', backref='alert', lazy=True, cascade='all, delete-orphan',
+                                 order_by='AlertRecipient.email')
+
+    __table_args__ = (
+        db.Index('ix_alert_user_type_keyword', 'user_id', 'keyword_type', 'keyword'),  # Duplicate detection
+        db.Index('ix_alert_user_created_at', 'user_id', 'created_at'),  # Dashboard listing
+    )
+
+    @property
+    def emails(self):
+        """Comma-joined recipient list, in the format the old alert.emails column stored"""
+        return ','.join(recipient.email for recipient in self.recipients)
+
+class AlertRecipient(db.Model):
+    """One receiver email of an alert. Replaces the comma-joined alert.emails column, which is
+    left in existing databases only as the source for migrate_alert_recipients()."""
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('alert.id', ondelete='CASCADE'), nullable=False, index=True)
+    email = db.Column(db.String(255), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_alert_recipient_email_alert', 'email', 'alert_id', unique=True),
+    )
+
+def normalize_recipient_emails(emails):
+    """Strip, drop blanks and de-duplicate a list of receiver emails"""
+    return sorted({email.strip() for email in emails if email and email.strip()})
+
+class SchedulerLease(db.Model):
+    """Lease row used for scheduler leader election when advisory locks are unavailable"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class BackgroundTask(db.Model):
+    """Durable queue entry for email delivery and alert processing work"""
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.String(255), nullable=False)
+    lane = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    priority = db.Column(db.Integer, nullable=False, default=10)  # Lower runs first: 0 interactive, 10 scheduled
+    locked_by = db.Column(db.String(100))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), index=True)
+    tender_count = db.Column(db.Integer)
+    timings = db.Column(db.Text)  # JSON phase durations in ms, e.g. {"fetch_ms": 1200, "send_ms": 80}
+    recipients = db.Column(db.Text)  # Email lane: lowercased receivers, comma-joined, used to coalesce per recipient
+
+    __table_args__ = (
+        db.Index('ix_background_task_claim', 'lane', 'status', 'priority', 'available_at'),
+    )
+
+class Tender(db.Model):
+    """Local store of crawled Etimad tenders, one row per tenderId, written by TenderWriter"""
+    tender_id = db.Column(db.String(64), primary_key=True)  # Etimad tenderId as text (tender_key)
+    tender_id_string = db.Column(db.String(100))  # Encrypted id used in Etimad detail links
+    reference_number = db.Column(db.String(100))
+    name = db.Column(db.Text)
+    agency_name = db.Column(db.String(255))
+    activity_name = db.Column(db.String(255))
+    submission_date = db.Column(db.DateTime, index=True)
+    last_enquiries_date = db.Column(db.DateTime)
+    last_offer_date = db.Column(db.DateTime)
+    payload = db.Column(db.Text, nullable=False)  # Raw Etimad JSON
+    first_seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_tender_agency_submission', 'agency_name', 'submission_date'),  # Tender browser filters
+        db.Index('ix_tender_activity_submission', 'activity_name', 'submission_date'),
+    )
+
+class TenderArchivePartition(db.Model):
+    """One month of tender_history: a partition of it on Postgres, its own table elsewhere"""
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM of submission_date
+    table_name = db.Column(db.String(50), nullable=False)
+    starts_at = db.Column(db.DateTime, nullable=False)  # Inclusive
+    ends_at = db.Column(db.DateTime, nullable=False)  # Exclusive, first instant of the next month
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    compacted_at = db.Column(db.DateTime)  # Set once raw payloads are compressed
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Columns added to tables that already exist in deployed databases. db.create_all() only
+# creates missing tables, so ensure_schema() adds these (and their indexes) when absent.
+SCHEMA_COLUMN_ADDITIONS = [
+    ('alert', 'schedule', 'VARCHAR(100)'),
+    ('alert', 'next_run_at', 'TIMESTAMP'),
+    ('alert', 'run_status', 'VARCHAR(20)'),
+    ('alert', 'run_attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ('alert', 'last_error', 'TEXT'),
+    ('alert', 'next_retry_at', 'TIMESTAMP'),
+    ('background_task', 'recipients', 'TEXT'),
+]
+SCHEMA_INDEX_ADDITIONS = [
+    ('ix_alert_next_run_at', 'alert', 'next_run_at'),
+    ('ix_alert_user_type_keyword', 'alert', 'user_id, keyword_type, keyword'),
+    ('ix_alert_user_created_at', 'alert', 'user_id, created_at'),
+    ('ix_tender_agency_submission', 'tender', 'agency_name, submission_date'),
+    ('ix_tender_activity_submission', 'tender', 'activity_name, submission_date'),
+]
+
+def ensure_schema():
+    """Create missing tables, then add columns and indexes introduced after the initial deploy"""
+    db.create_all()
+    inspector = db.inspect(db.engine)
+    for table, column, column_type in SCHEMA_COLUMN_ADDITIONS:
+        existing = {col['name'] for col in inspector.get_columns(table)}
+        if column not in existing:
+            db.session.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {column_type}'))
+            print(f"[{datetime.now()}] Added column {table}.{column}")
+    for index_name, table, columns in SCHEMA_INDEX_ADDITIONS:
+        db.session.execute(text(f'CREATE INDEX IF NOT EXISTS {index_name} ON "{table}" ({columns})'))
+    db.session.commit()
+    backfill_alert_created_at()
+    migrate_alert_recipients()
+
+def backfill_alert_created_at():
+    """Give legacy alerts without created_at distinct timestamps, so dashboard pages sorted by date are stable.
+    Rows are spaced a second apart in id order, ending just before the earliest known created_at or last run."""
+    alert_ids = [alert_id for (alert_id,) in db.session.query(Alert.id).filter(Alert.created_at.is_(None)).order_by(Alert.id)]
+    if not alert_ids:
+        return 0
+    anchor = min(filter(None, [
+        db.session.query(db.func.min(Alert.created_at)).scalar(),
+        db.session.query(db.func.min(Alert.last_run_date)).filter(Alert.created_at.is_(None)).scalar(),
+    ]), default=None) or datetime.utcnow()
+    # Typed bulk update, so SQLite stores the same datetime format the dashboard cursors compare against
+    db.session.execute(update(Alert), [
+        {'id': alert_id, 'created_at': anchor - timedelta(seconds=len(alert_ids) - position)}
+        for position, alert_id in enumerate(alert_ids)
+    ])
+    db.session.commit()
+    print(f"[{datetime.now()}] Backfilled created_at for {len(alert_ids)} alerts")
+    return len(alert_ids)
+
+def migrate_alert_recipients():
+    """Copy the legacy comma-joined alert.emails column into alert_recipient rows.
+    Only alerts without recipients are migrated, so this is safe to run on every start."""
+    if 'emails' not in {col['name'] for col in db.inspect(db.engine).get_columns('alert')}:
+        return 0
+    rows = db.session.execute(text("""
+        SELECT a.id, a.emails FROM alert a
+        WHERE a.emails IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM alert_recipient r WHERE r.alert_id = a.id)
+    """)).all()
+    recipients = [
+        {'alert_id': alert_id, 'email': email}
+        for alert_id, emails in rows
+        for email in normalize_recipient_emails(emails.split(','))
+    ]
+    if recipients:
+        db.session.execute(insert(AlertRecipient), recipients)
+        print(f"[{datetime.now()}] Migrated {len(recipients)} recipients for {len(rows)} alerts to alert_recipient")
+    db.session.commit()
+    return len(recipients)
 
 @app.route('/ping', methods=['GET'])
 def ping():
-    return jsonify({"message": "pong"})
+    return jsonify({"message": "pong", "mode": app.config.get('SIGNAL_MODE', 'serverless' if SERVERLESS else 'server'),
+                    "import_ms": round(APP_IMPORT_SECONDS * 1000, 1)})
     
 
 @login_manager.user_loader
@@ -311,6 +538,454 @@ def fetch_tenders():
     log_memory_usage("Fetch Tenders.")
     return valid_tenders
 
+# Shared tender snapshot: the last complete crawl, kept in memory and on disk with its
+# timestamp so on-demand tasks can reuse a recent crawl instead of hitting Etimad again
+TENDER_SNAPSHOT_PATH = os.getenv('TENDER_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'signal_tender_snapshot.json'))
+TENDER_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('TENDER_SNAPSHOT_MAX_AGE_SECONDS', '1800'))  # Default staleness for on-demand tasks
+SCHEDULED_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('SCHEDULED_SNAPSHOT_MAX_AGE_SECONDS', '1800'))  # Cap on the staleness scheduled runs accept
+
+tender_snapshot = {'tenders': None, 'fetched_at': None, 'generation': 0}  # generation counts completed crawls
+tender_snapshot_lock = threading.Lock()
+tender_snapshot_refresh_lock = threading.Lock()  # Single flight: one crawl at a time, other callers wait for it
+
+def load_tender_snapshot_from_disk():
+    """Load the on-disk snapshot into memory if it is newer than the in-memory one"""
+    try:
+        with open(TENDER_SNAPSHOT_PATH, 'r', encoding='utf-8') as file:
+            stored = json.load(file)
+        fetched_at = datetime.fromisoformat(stored['fetched_at'])
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not read tender snapshot from {TENDER_SNAPSHOT_PATH}: {e}")
+        return
+    
+    with tender_snapshot_lock:
+        if tender_snapshot['fetched_at'] is None or fetched_at > tender_snapshot['fetched_at']:
+            tender_snapshot['tenders'] = stored['tenders']
+            tender_snapshot['fetched_at'] = fetched_at
+            print(f"[{datetime.now()}] Loaded tender snapshot from disk ({len(stored['tenders'])} tenders, fetched {fetched_at})")
+
+def save_tender_snapshot(tenders, fetched_at):
+    """Store a completed crawl in memory and atomically on disk"""
+    with tender_snapshot_lock:
+        tender_snapshot['tenders'] = tenders
+        tender_snapshot['fetched_at'] = fetched_at
+        tender_snapshot['generation'] += 1
+    
+    try:
+        temporary_path = f"{TENDER_SNAPSHOT_PATH}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({'fetched_at': fetched_at.isoformat(), 'tenders': tenders}, file, ensure_ascii=False)
+        os.replace(temporary_path, TENDER_SNAPSHOT_PATH)
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not write tender snapshot to {TENDER_SNAPSHOT_PATH}: {e}")
+
+def get_fresh_snapshot(max_age_seconds, requested_generation):
+    """Return the snapshot tenders if they satisfy the max-age contract, else None"""
+    with tender_snapshot_lock:
+        fetched_at = tender_snapshot['fetched_at']
+        if fetched_at is None:
+            return None
+        # A crawl that completed after the request was made is always acceptable
+        if tender_snapshot['generation'] > requested_generation or datetime.now() - fetched_at <= timedelta(seconds=max_age_seconds):
+            return tender_snapshot['tenders']
+    return None
+
+def get_tenders_snapshot(max_age_seconds=None):
+    """Return tenders from a crawl at most `max_age_seconds` old, crawling Etimad only when needed.
+    Concurrent callers share a single in-flight crawl."""
+    if max_age_seconds is None:
+        max_age_seconds = TENDER_SNAPSHOT_MAX_AGE_SECONDS
+    with tender_snapshot_lock:
+        requested_generation = tender_snapshot['generation']
+    
+    tenders = get_fresh_snapshot(max_age_seconds, requested_generation)
+    if tenders is None:
+        load_tender_snapshot_from_disk()
+        tenders = get_fresh_snapshot(max_age_seconds, requested_generation)
+    if tenders is not None:
+        print(f"[{datetime.now()}] Using tender snapshot from {tender_snapshot['fetched_at']} ({len(tenders)} tenders, max age {max_age_seconds}s)")
+        return tenders
+    
+    with tender_snapshot_refresh_lock:
+        # Another caller may have finished a crawl while we waited for the lock
+        tenders = get_fresh_snapshot(max_age_seconds, requested_generation)
+        if tenders is not None:
+            print(f"[{datetime.now()}] Using tender snapshot refreshed by another task ({len(tenders)} tenders)")
+            return tenders
+        
+        print(f"[{datetime.now()}] Tender snapshot older than {max_age_seconds}s, refreshing from Etimad...")
+        fetched_at = datetime.now()
+        tenders = fetch_tenders()
+        save_tender_snapshot(tenders, fetched_at)
+        store_tenders(tenders)
+        return tenders
+
+# Tender store writer: crawls and backfills upsert into the tender table in batches instead of
+# row by row. Postgres COPYs each batch into a temporary staging table and merges it with
+# INSERT ... ON CONFLICT; other databases use an executemany upsert.
+TENDER_WRITE_BATCH_SIZE = int(os.getenv('TENDER_WRITE_BATCH_SIZE', '2000'))
+TENDER_COLUMNS = ['tender_id', 'tender_id_string', 'reference_number', 'name', 'agency_name', 'activity_name',
+                  'submission_date', 'last_enquiries_date', 'last_offer_date', 'payload', 'first_seen_at', 'last_seen_at']
+TENDER_UPDATE_COLUMNS = [column for column in TENDER_COLUMNS if column not in ('tender_id', 'first_seen_at')]
+TENDER_DATE_COLUMNS = ['submission_date', 'last_enquiries_date', 'last_offer_date', 'first_seen_at', 'last_seen_at']
+
+def datetime_params(statement, *names):
+    """Bind the named parameters of a text() statement as DateTime, so SQLite stores and compares
+    them in the same format the ORM uses (keyset cursors depend on it)"""
+    return statement.bindparams(*(bindparam(name, type_=db.DateTime) for name in names))
+
+def parse_etimad_date(value):
+    """Parse an Etimad timestamp (2025-08-24T10:00:00.0000000, or a bare date) into a datetime, else None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).split('.')[0])
+    except ValueError:
+        return None
+
+def normalize_tender(tender, seen_at):
+    """Map a raw Etimad tender onto Tender columns; None when it has no tenderId to key on"""
+    if tender.get('tenderId') in (None, ''):
+        return None
+    return {
+        'tender_id': str(tender['tenderId']),
+        'tender_id_string': tender.get('tenderIdString') or None,
+        'reference_number': tender.get('referenceNumber') or None,
+        'name': tender.get('tenderName') or None,
+        'agency_name': tender.get('agencyName') or None,
+        'activity_name': tender.get('tenderActivityName') or None,
+        'submission_date': parse_etimad_date(tender.get('submitionDate')),
+        'last_enquiries_date': parse_etimad_date(tender.get('lastEnqueriesDate')),
+        'last_offer_date': parse_etimad_date(tender.get('lastOfferPresentationDate')),
+        'payload': json.dumps(tender, ensure_ascii=False, default=str),
+        'first_seen_at': seen_at,
+        'last_seen_at': seen_at
+    }
+
+class TenderWriter:
+    """Buffers normalised tenders and upserts them into the tender table every `batch_size` rows.
+    Must be used inside an app context; use as a context manager so the tail is flushed."""
+    def __init__(self, batch_size=None, seen_at=None):
+        self.batch_size = batch_size or TENDER_WRITE_BATCH_SIZE
+        self.seen_at = seen_at or datetime.utcnow()
+        self.buffer = {}  # tender_id -> row; a tender repeated within a batch keeps its latest version
+        self.stats = {'received': 0, 'skipped': 0, 'written': 0, 'flushes': 0, 'seconds': 0.0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if exc_type is None:
+            self.flush()
+
+    def add(self, tender):
+        self.stats['received'] += 1
+        row = normalize_tender(tender, self.seen_at)
+        if row is None:
+            self.stats['skipped'] += 1
+            return
+        self.buffer[row['tender_id']] = row
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, tenders):
+        for tender in tenders:
+            self.add(tender)
+        return self
+
+    def flush(self):
+        """Write the buffered rows in one statement batch and commit"""
+        if not self.buffer:
+            return 0
+        rows = list(self.buffer.values())
+        self.buffer = {}
+        started = time.perf_counter()
+        if db.engine.dialect.name == 'postgresql':
+            backend = 'copy'
+            copy_upsert_tenders(rows)
+        else:
+            backend = 'executemany'
+            executemany_upsert_tenders(rows)
+        elapsed = time.perf_counter() - started
+        self.stats['written'] += len(rows)
+        self.stats['flushes'] += 1
+        self.stats['seconds'] += elapsed
+        print(f"[{datetime.now()}] Tender store flush {self.stats['flushes']}: {len(rows)} rows via {backend} "
+              f"in {elapsed * 1000:.0f} ms ({len(rows) / elapsed if elapsed else 0:.0f} rows/s)")
+        return len(rows)
+
+def copy_upsert_tenders(rows):
+    """COPY rows into a transaction-scoped staging table, then merge them into tender in one statement"""
+    columns = ', '.join(TENDER_COLUMNS)
+    assignments = ', '.join(f'{column} = EXCLUDED.{column}' for column in TENDER_UPDATE_COLUMNS)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[column].isoformat() if isinstance(row[column], datetime) else row[column] for column in TENDER_COLUMNS])
+    buffer.seek(0)
+    
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # ON COMMIT DROP keeps the staging table private to this transaction, which also holds behind a transaction pooler
+        cursor.execute('CREATE TEMP TABLE tender_staging (LIKE tender INCLUDING DEFAULTS) ON COMMIT DROP')
+        cursor.copy_expert(f'COPY tender_staging ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(f'INSERT INTO tender ({columns}) SELECT {columns} FROM tender_staging '
+                       f'ON CONFLICT (tender_id) DO UPDATE SET {assignments}')
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+def executemany_upsert_tenders(rows):
+    """Upsert rows with a single executemany INSERT ... ON CONFLICT (SQLite 3.24+)"""
+    columns = ', '.join(TENDER_COLUMNS)
+    placeholders = ', '.join(f':{column}' for column in TENDER_COLUMNS)
+    assignments = ', '.join(f'{column} = excluded.{column}' for column in TENDER_UPDATE_COLUMNS)
+    statement = text(f'INSERT INTO tender ({columns}) VALUES ({placeholders}) ON CONFLICT (tender_id) DO UPDATE SET {assignments}')
+    db.session.execute(datetime_params(statement, *TENDER_DATE_COLUMNS), rows)
+    db.session.commit()
+
+def store_tenders(tenders, seen_at=None):
+    """Persist a crawl in the tender store. Failures are logged, never raised, so alerting carries on
+    from the snapshot even when the store is unavailable."""
+    try:
+        with app.app_context():
+            with TenderWriter(seen_at=seen_at) as writer:
+                writer.add_many(tenders)
+        print(f"[{datetime.now()}] Stored {writer.stats['written']} tenders in {writer.stats['flushes']} flushes "
+              f"({writer.stats['seconds']:.2f}s, {writer.stats['skipped']} without tenderId)")
+        return writer.stats
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not store tenders: {e}")
+        return None
+
+# Tender archive: tenders whose submission date falls out of the hot window move from tender into
+# tender_history, partitioned by submission month (declarative range partitions on Postgres,
+# one tender_history_YYYYMM table per month elsewhere). Old months get their raw payloads
+# compressed and months past the retention horizon are dropped whole.
+TENDER_HOT_DAYS = int(os.getenv('TENDER_HOT_DAYS', '60'))  # Matches the window filter_tenders looks at
+TENDER_ARCHIVE_RETENTION_MONTHS = int(os.getenv('TENDER_ARCHIVE_RETENTION_MONTHS', '24'))
+TENDER_ARCHIVE_COMPACT_AFTER_MONTHS = int(os.getenv('TENDER_ARCHIVE_COMPACT_AFTER_MONTHS', '3'))
+TENDER_ARCHIVE_COMPACT_BATCH_SIZE = int(os.getenv('TENDER_ARCHIVE_COMPACT_BATCH_SIZE', '2000'))
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+def add_months(value, months):
+    """First instant of the month `months` away from the month of `value`"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def tender_history_columns_sql(dialect_name):
+    """Column definitions shared by the partitioned parent (Postgres) and the per-month tables"""
+    binary_type = 'BYTEA' if dialect_name == 'postgresql' else 'BLOB'
+    return (
+        'tender_id VARCHAR(64) NOT NULL, tender_id_string VARCHAR(100), reference_number VARCHAR(100), name TEXT, '
+        'agency_name VARCHAR(255), activity_name VARCHAR(255), submission_date TIMESTAMP NOT NULL, '
+        'last_enquiries_date TIMESTAMP, last_offer_date TIMESTAMP, payload TEXT, '
+        f'payload_compressed {binary_type}, first_seen_at TIMESTAMP NOT NULL, last_seen_at TIMESTAMP NOT NULL, '
+        'archived_at TIMESTAMP NOT NULL'
+    )
+
+def ensure_tender_partition(month):
+    """Return the registry row for the month starting at `month`, creating its table/partition if needed"""
+    key = month.strftime('%Y-%m')
+    partition = db.session.get(TenderArchivePartition, key)
+    if partition is not None:
+        return partition
+    
+    dialect_name = db.engine.dialect.name
+    table_name = f"tender_history_{month.strftime('%Y%m')}"
+    ends_at = add_months(month, 1)
+    if dialect_name == 'postgresql':
+        # The partition key has to be part of the primary key, so it is (tender_id, submission_date)
+        db.session.execute(text(f'CREATE TABLE IF NOT EXISTS tender_history ({tender_history_columns_sql(dialect_name)}, '
+                                f'PRIMARY KEY (tender_id, submission_date)) PARTITION BY RANGE (submission_date)'))
+        db.session.execute(text('CREATE INDEX IF NOT EXISTS ix_tender_history_submission_date ON tender_history (submission_date)'))
+        db.session.execute(text(f"CREATE TABLE IF NOT EXISTS {table_name} PARTITION OF tender_history "
+                                f"FOR VALUES FROM ('{month.isoformat(' ')}') TO ('{ends_at.isoformat(' ')}')"))
+    else:
+        db.session.execute(text(f'CREATE TABLE IF NOT EXISTS {table_name} ({tender_history_columns_sql(dialect_name)}, '
+                                f'PRIMARY KEY (tender_id))'))
+        db.session.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table_name}_submission_date ON {table_name} (submission_date)'))
+    partition = TenderArchivePartition(month=key, table_name=table_name, starts_at=month, ends_at=ends_at, row_count=0)
+    db.session.add(partition)
+    db.session.flush()
+    print(f"[{datetime.now()}] Created tender archive partition {table_name}")
+    return partition
+
+def archive_tenders(now=None):
+    """Move tenders submitted before the hot window into their monthly archive partitions.
+    Each month is one INSERT ... SELECT upsert, followed by a single DELETE, in one transaction."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=TENDER_HOT_DAYS)
+    oldest = db.session.query(db.func.min(Tender.submission_date)).filter(Tender.submission_date < cutoff).scalar()
+    if oldest is None:
+        return 0
+    
+    is_postgres = db.engine.dialect.name == 'postgresql'
+    columns = ', '.join(TENDER_COLUMNS)
+    conflict = '(tender_id, submission_date)' if is_postgres else '(tender_id)'
+    assignments = ', '.join([f'{column} = excluded.{column}' for column in TENDER_UPDATE_COLUMNS if column != 'submission_date']
+                            + ['payload_compressed = NULL', 'archived_at = excluded.archived_at'])
+    moved = 0
+    # Months already past retention are deleted without being archived first
+    month = max(month_start(oldest), add_months(month_start(now), -TENDER_ARCHIVE_RETENTION_MONTHS))
+    while month < cutoff:
+        partition = ensure_tender_partition(month)
+        target = 'tender_history' if is_postgres else partition.table_name  # Postgres routes rows to the partition
+        result = db.session.execute(datetime_params(text(
+            f'INSERT INTO {target} ({columns}, archived_at) SELECT {columns}, :archived_at FROM tender '
+            f'WHERE submission_date >= :starts_at AND submission_date < :ends_at ON CONFLICT {conflict} DO UPDATE SET {assignments}'
+        ), 'archived_at', 'starts_at', 'ends_at'), {'archived_at': now, 'starts_at': partition.starts_at, 'ends_at': min(partition.ends_at, cutoff)})
+        if result.rowcount:
+            moved += result.rowcount
+            partition.row_count = db.session.execute(text(f'SELECT COUNT(*) FROM {partition.table_name}')).scalar()
+            partition.compacted_at = None  # Fresh raw payloads; compact the month again
+        month = add_months(month, 1)
+    
+    db.session.execute(datetime_params(text('DELETE FROM tender WHERE submission_date < :cutoff'), 'cutoff'), {'cutoff': cutoff})
+    db.session.commit()
+    print(f"[{datetime.now()}] Archived {moved} tenders submitted before {cutoff:%Y-%m-%d}")
+    return moved
+
+def compact_tender_archive(now=None):
+    """Compress the raw payloads of partitions older than TENDER_ARCHIVE_COMPACT_AFTER_MONTHS"""
+    now = now or datetime.utcnow()
+    threshold = add_months(month_start(now), -TENDER_ARCHIVE_COMPACT_AFTER_MONTHS)
+    partitions = TenderArchivePartition.query.filter(TenderArchivePartition.ends_at <= threshold,
+                                                     TenderArchivePartition.compacted_at.is_(None)).all()
+    compacted = 0
+    for partition in partitions:
+        raw_bytes = compressed_bytes = 0
+        while True:
+            rows = db.session.execute(text(f'SELECT tender_id, payload FROM {partition.table_name} WHERE payload IS NOT NULL LIMIT :limit'),
+                                      {'limit': TENDER_ARCHIVE_COMPACT_BATCH_SIZE}).all()
+            if not rows:
+                break
+            updates = []
+            for tender_id, payload in rows:
+                encoded = payload.encode('utf-8')
+                compressed = zlib.compress(encoded, 9)
+                raw_bytes += len(encoded)
+                compressed_bytes += len(compressed)
+                updates.append({'tender_id': tender_id, 'payload_compressed': compressed})
+            db.session.execute(text(f'UPDATE {partition.table_name} SET payload_compressed = :payload_compressed, payload = NULL '
+                                    f'WHERE tender_id = :tender_id'), updates)
+            compacted += len(updates)
+        partition.compacted_at = now
+        db.session.commit()
+        print(f"[{datetime.now()}] Compacted {partition.table_name}: payloads {raw_bytes} -> {compressed_bytes} bytes")
+    return compacted
+
+def apply_tender_archive_retention(now=None):
+    """Drop whole partitions that ended before the retention horizon"""
+    now = now or datetime.utcnow()
+    horizon = add_months(month_start(now), -TENDER_ARCHIVE_RETENTION_MONTHS)
+    partitions = TenderArchivePartition.query.filter(TenderArchivePartition.ends_at <= horizon).all()
+    for partition in partitions:
+        db.session.execute(text(f'DROP TABLE IF EXISTS {partition.table_name}'))
+        db.session.delete(partition)
+        print(f"[{datetime.now()}] Dropped tender archive partition {partition.table_name} ({partition.row_count} tenders)")
+    db.session.commit()
+    return len(partitions)
+
+def maintain_tender_archive(now=None):
+    """Archive, compact and expire tender history; returns counts for logging"""
+    started = time.perf_counter()
+    with app.app_context():
+        summary = {
+            'archived': archive_tenders(now),
+            'compacted': compact_tender_archive(now),
+            'dropped_partitions': apply_tender_archive_retention(now)
+        }
+    summary['seconds'] = round(time.perf_counter() - started, 3)
+    print(f"[{datetime.now()}] Tender archive maintenance: {summary}")
+    return summary
+
+def decode_tender_payload(payload, payload_compressed):
+    if payload is None and payload_compressed is not None:
+        payload = zlib.decompress(payload_compressed).decode('utf-8')
+    return json.loads(payload) if payload else None
+
+def tender_history_union(select_columns, start, end=None, agency_name=None, activity_name=None, search=None, extra_conditions=()):
+    """UNION ALL of `select_columns` over the hot table and the archive for tenders submitted in
+    [start, end), with the parameters it binds. Only partitions overlapping the range are read:
+    Postgres prunes them from the submission_date bounds, elsewhere the UNION only names the month
+    tables the registry says overlap. A tender crawled again after it was archived sits in both until
+    the next archive run; the hot copy is the current one, so the archived copy is skipped."""
+    conditions = ['submission_date >= :start']
+    params = {'start': start}
+    if end:
+        conditions.append('submission_date < :end')
+        params['end'] = end
+    if agency_name:
+        conditions.append('agency_name = :agency_name')
+        params['agency_name'] = agency_name
+    if activity_name:
+        conditions.append('activity_name = :activity_name')
+        params['activity_name'] = activity_name
+    if search:
+        conditions.append('(LOWER(name) LIKE :search OR LOWER(reference_number) LIKE :search)')
+        params['search'] = f'%{search.lower()}%'
+    where = ' AND '.join(conditions + list(extra_conditions))
+    
+    selects = [f'SELECT {select_columns.format(payload_compressed="NULL")} FROM tender WHERE {where}']
+    archived_select = (f'SELECT {select_columns.format(payload_compressed="payload_compressed")} FROM {{table}} archived '
+                       f'WHERE {where} AND NOT EXISTS (SELECT 1 FROM tender hot WHERE hot.tender_id = archived.tender_id)')
+    if db.engine.dialect.name == 'postgresql':
+        if TenderArchivePartition.query.first() is not None:  # tender_history exists once a partition does
+            selects.append(archived_select.format(table='tender_history'))
+    else:
+        partitions = TenderArchivePartition.query.filter(TenderArchivePartition.ends_at > start)
+        if end:
+            partitions = partitions.filter(TenderArchivePartition.starts_at < end)
+        selects.extend(archived_select.format(table=partition.table_name) for partition in partitions.all())
+    return ' UNION ALL '.join(selects), params
+
+def query_tender_history(start, end=None, agency_name=None, activity_name=None, search=None, after=None, before=None, limit=1000):
+    """Tenders submitted in [start, end), newest first, from the hot table and the archive.
+    `after`/`before` are (submission_date, tender_id) keyset boundaries: return the rows older
+    than `after`, or the `limit` rows just newer than `before`."""
+    boundary_conditions = []
+    boundary = after or before
+    if boundary:
+        # Spelled out rather than as a row value comparison, which older SQLite lacks
+        operator = '<' if after else '>'
+        boundary_conditions.append(f'(submission_date {operator} :boundary_date OR '
+                                   f'(submission_date = :boundary_date AND tender_id {operator} :boundary_id))')
+    columns = ', '.join(column for column in TENDER_COLUMNS if column != 'payload')
+    union, params = tender_history_union(f'{columns}, payload, {{payload_compressed}} AS payload_compressed', start, end,
+                                         agency_name, activity_name, search, boundary_conditions)
+    params['limit'] = limit
+    if boundary:
+        params['boundary_date'], params['boundary_id'] = boundary
+    
+    direction = 'ASC' if before and not after else 'DESC'  # Paging backwards scans towards newer rows
+    statement = text(f'{union} ORDER BY submission_date {direction}, tender_id {direction} LIMIT :limit')
+    statement = datetime_params(statement, *[name for name in ('start', 'end', 'boundary_date') if name in params])
+    statement = statement.columns(**{column: db.DateTime for column in TENDER_DATE_COLUMNS})
+    rows = db.session.execute(statement, params).mappings().all()
+    history = []
+    for row in rows:
+        entry = {key: value for key, value in row.items() if key not in ('payload', 'payload_compressed')}
+        entry['tender'] = decode_tender_payload(row['payload'], row['payload_compressed'])
+        history.append(entry)
+    if direction == 'ASC':
+        history.reverse()
+    return history
+
+def count_tender_history(start, end=None, agency_name=None, activity_name=None, search=None):
+    """Number of tenders query_tender_history would return for these filters without a limit"""
+    union, params = tender_history_union('1', start, end, agency_name, activity_name, search)
+    return db.session.execute(datetime_params(text(f'SELECT COUNT(*) FROM ({union}) AS history'),
+                                              *[name for name in ('start', 'end') if name in params]), params).scalar()
+
 # Filter tenders based on keywords
 def filter_tenders(tenders, search_criteria):
     filtered_tenders = []
@@ -366,11 +1041,8 @@ def filter_tenders(tenders, search_criteria):
     log_memory_usage("Filter Tenders.")
     return filtered_tenders
 
-def send_email(tenders, search_criteria, receiver_emails):
-    subject = "🎯 New Matching Tenders Found - Signal Alert"
-    
-    # Create beautiful HTML email template with blue and gold theme
-    html_template = """<!DOCTYPE html>
+# Beautiful HTML email template with blue and gold theme
+EMAIL_HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -572,346 +1244,1430 @@ def send_email(tenders, search_criteria, receiver_emails):
     </div>
 </body>
 </html>"""
-    
-    # Construct search criteria information
-    criteria_items = []
-    if search_criteria.get('agency_name'):
-        criteria_items.append(f'<div class="criteria-item">🏛️ Agency: {search_criteria["agency_name"]}</div>')
-    if search_criteria.get('activity_name'):
-        criteria_items.append(f'<div class="criteria-item">⚡ Activity: {search_criteria["activity_name"]}</div>')
-    if search_criteria.get('keywords'):
-        criteria_items.append(f'<div class="criteria-item">🔑 Keywords: {", ".join(search_criteria["keywords"])}</div>')
-    if search_criteria.get('tender_name'):
-        criteria_items.append(f'<div class="criteria-item">📋 Tender Name: {search_criteria["tender_name"]}</div>')
-    
-    criteria_html = "".join(criteria_items) if criteria_items else '<div class="criteria-item">📊 General Alert - All New Tenders</div>'
-    
-    # Generate tender cards HTML
-    tenders_html = ""
-    for tender in tenders:
-        try:
-            # Parse dates
-            submission_date_str = tender['submitionDate'].split('.')[0] if tender.get('submitionDate') else "N/A"
-            submission_date = datetime.strptime(submission_date_str, "%Y-%m-%dT%H:%M:%S") if submission_date_str != "N/A" else None
-            formatted_submission_date = submission_date.strftime("%Y-%m-%d %H:%M:%S") if submission_date else "N/A"
-            
-            last_enqueries_date_str = tender.get('lastEnqueriesDate', '').split('.')[0] if tender.get('lastEnqueriesDate') else "N/A"
-            last_enqueries_date = datetime.strptime(last_enqueries_date_str, "%Y-%m-%dT%H:%M:%S") if last_enqueries_date_str != "N/A" else None
-            formatted_last_enqueries_date = last_enqueries_date.strftime("%Y-%m-%d %H:%M:%S") if last_enqueries_date else "N/A"
-            
-            last_offer_date_str = tender.get('lastOfferPresentationDate', '').split('.')[0] if tender.get('lastOfferPresentationDate') else "N/A"
-            last_offer_date = datetime.strptime(last_offer_date_str, "%Y-%m-%dT%H:%M:%S") if last_offer_date_str != "N/A" else None
-            formatted_last_offer_date = last_offer_date.strftime("%Y-%m-%d %H:%M:%S") if last_offer_date else "N/A"
-            
-            tender_html = f"""
+
+# Tender card fragment, rendered once per tender and reused across digests
+TENDER_CARD_TEMPLATE = """
             <div class="tender-card">
                 <div class="tender-header">
-                    <div class="tender-title">{tender.get('tenderName', 'N/A')}</div>
-                    <div class="tender-id">ID: {tender.get('tenderId', 'N/A')}</div>
+                    <div class="tender-title">{tender_name}</div>
+                    <div class="tender-id">ID: {tender_id}</div>
                 </div>
                 
                 <div class="tender-details">
                     <div class="detail-item">
                         <div class="detail-label">Agency</div>
-                        <div class="detail-value">{tender.get('agencyName', 'N/A')}</div>
+                        <div class="detail-value">{agency_name}</div>
                     </div>
                     <div class="detail-item">
                         <div class="detail-label">Activity</div>
-                        <div class="detail-value">{tender.get('tenderActivityName', 'N/A')}</div>
+                        <div class="detail-value">{activity_name}</div>
                     </div>
                     <div class="detail-item">
                         <div class="detail-label">Submission Date</div>
-                        <div class="detail-value">{formatted_last_offer_date}</div>
+                        <div class="detail-value">{last_offer_date}</div>
                     </div>
                     <div class="detail-item">
                         <div class="detail-label">Last Enquiries</div>
-                        <div class="detail-value">{formatted_last_enqueries_date}</div>
+                        <div class="detail-value">{last_enqueries_date}</div>
                     </div>
                     <div class="detail-item">
                         <div class="detail-label">Published Date</div>
-                        <div class="detail-value">{formatted_submission_date}</div>
+                        <div class="detail-value">{submission_date}</div>
                     </div>
                     <div class="detail-item">
                         <div class="detail-label">Reference</div>
-                        <div class="detail-value">{tender.get('referenceNumber', 'N/A')}</div>
+                        <div class="detail-value">{reference_number}</div>
                     </div>
                 </div>
                 
-                <a href="https://tenders.etimad.sa/Tender/DetailsForVisitor?STenderId={tender.get('tenderIdString', '')}" 
+                <a href="https://tenders.etimad.sa/Tender/DetailsForVisitor?STenderId={tender_id_string}" 
                    class="view-button" target="_blank">
                    🔍 View Full Tender Details
                 </a>
             </div>
             """
-            tenders_html += tender_html
+
+# Compact digest format: styles are pre-inlined on each element (no <style> block) so large
+# digests stay small. Only the first EMAIL_MAX_TENDER_CARDS tenders get full cards; the rest
+# are summarised per agency in a single table.
+COMPACT_EMAIL_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Signal Tender Alert</title>
+</head>
+<body style="margin:0;padding:0;background:#f8f9ff;color:#343a40;font-family:'Segoe UI',Tahoma,Geneva,Verdana,sans-serif;">
+<div style="max-width:600px;margin:0 auto;background:#ffffff;">
+<div style="background:#0105ae;color:#ffffff;padding:24px 20px;text-align:center;">
+<div style="font-size:24px;font-weight:700;">🎯 Signal Alert</div>
+<div style="margin-top:8px;font-size:15px;color:#f1c061;">{tender_count} New Matching Tenders Found</div>
+</div>
+<div style="padding:20px;">
+<div style="border:2px solid #0105ae;border-radius:8px;padding:12px 16px;margin-bottom:20px;">
+<div style="color:#0105ae;font-weight:700;margin-bottom:8px;">🔍 Search Criteria</div>
+{criteria_html}
+</div>
+{tenders_html}
+{overflow_html}
+</div>
+<div style="background:#f8f9ff;padding:16px;text-align:center;border-top:1px solid #e9ecef;color:#6c757d;font-size:13px;">
+This alert was generated by Signal Tender Monitoring System<br>Powered by Beyond Digital Team • {current_time}
+</div>
+</div>
+</body>
+</html>"""
+
+COMPACT_TENDER_CARD_TEMPLATE = """<div style="border:1px solid #e9ecef;border-radius:8px;margin:12px 0;">
+<div style="background:#0105ae;color:#ffffff;padding:10px 14px;border-radius:8px 8px 0 0;"><b>{tender_name}</b><div style="color:#f1c061;font-size:13px;">ID: {tender_id}</div></div>
+<table style="width:100%;font-size:13px;padding:8px 14px;" cellpadding="3">
+<tr><td style="color:#0105ae;font-weight:600;">Agency</td><td>{agency_name}</td></tr>
+<tr><td style="color:#0105ae;font-weight:600;">Activity</td><td>{activity_name}</td></tr>
+<tr><td style="color:#0105ae;font-weight:600;">Submission Date</td><td>{last_offer_date}</td></tr>
+<tr><td style="color:#0105ae;font-weight:600;">Last Enquiries</td><td>{last_enqueries_date}</td></tr>
+<tr><td style="color:#0105ae;font-weight:600;">Published Date</td><td>{submission_date}</td></tr>
+<tr><td style="color:#0105ae;font-weight:600;">Reference</td><td>{reference_number}</td></tr>
+</table>
+<div style="padding:0 14px 12px;"><a href="https://tenders.etimad.sa/Tender/DetailsForVisitor?STenderId={tender_id_string}" style="color:#000056;background:#f1c061;padding:8px 16px;border-radius:6px;text-decoration:none;font-weight:600;" target="_blank">🔍 View Full Tender Details</a></div>
+</div>
+"""
+
+COMPACT_OVERFLOW_TEMPLATE = """<div style="margin-top:20px;">
+<div style="color:#0105ae;font-weight:700;margin-bottom:8px;">📋 {overflow_count} more matching tenders</div>
+<table style="width:100%;border-collapse:collapse;font-size:13px;" cellpadding="6">
+<tr style="background:#0105ae;color:#ffffff;"><th align="left">Agency</th><th align="right">Tenders</th><th align="left">Closest Deadline</th></tr>
+{overflow_rows}
+</table>
+</div>
+"""
+
+def compile_template(template):
+    """Split a str.format template into (literal, field) pairs once so rendering is a plain join"""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+def render_compiled_template(parts, values):
+    """Render a template produced by compile_template"""
+    output = []
+    for literal, field in parts:
+        output.append(literal)
+        if field is not None:
+            output.append(str(values[field]))
+    return "".join(output)
+
+EMAIL_HTML_PARTS = compile_template(EMAIL_HTML_TEMPLATE)
+TENDER_CARD_PARTS = compile_template(TENDER_CARD_TEMPLATE)
+COMPACT_EMAIL_HTML_PARTS = compile_template(COMPACT_EMAIL_HTML_TEMPLATE)
+COMPACT_TENDER_CARD_PARTS = compile_template(COMPACT_TENDER_CARD_TEMPLATE)
+COMPACT_OVERFLOW_PARTS = compile_template(COMPACT_OVERFLOW_TEMPLATE)
+
+# 'compact' (inline styles, capped cards, overflow summary) or 'full' (original layout, every card)
+EMAIL_DIGEST_FORMAT = os.getenv('EMAIL_DIGEST_FORMAT', 'compact')
+EMAIL_MAX_TENDER_CARDS = int(os.getenv('EMAIL_MAX_TENDER_CARDS', '25'))
+
+CRITERIA_ITEM_TEMPLATES = {
+    'full': '<div class="criteria-item">{}</div>',
+    'compact': '<div style="border-left:4px solid #f1c061;padding:4px 10px;margin:4px 0;">{}</div>'
+}
+
+# LRU cache of rendered tender cards shared by the delivery workers, so a popular tender is
+# rendered once rather than once per recipient. Keys hold every field a card renders, so an
+# amended tender (e.g. a moved deadline) gets a new card without any process-wide invalidation.
+TENDER_CARD_FIELDS = ('tenderId', 'tenderName', 'agencyName', 'tenderActivityName', 'lastOfferPresentationDate',
+                      'lastEnqueriesDate', 'submitionDate', 'referenceNumber', 'tenderIdString')
+tender_card_cache = OrderedDict()
+tender_card_cache_lock = threading.Lock()
+TENDER_CARD_CACHE_MAX_SIZE = int(os.getenv('TENDER_CARD_CACHE_MAX_SIZE', '5000'))
+
+def format_tender_date(value):
+    """Format an Etimad ISO timestamp like 2025-08-24T10:00:00.0000000 for display"""
+    if not value:
+        return "N/A"
+    parsed = datetime.strptime(value.split('.')[0], "%Y-%m-%dT%H:%M:%S")
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+def render_tender_card(tender, digest_format='full'):
+    """Render a single tender card, reusing the cached fragment when available"""
+    cache_key = (digest_format,) + tuple(str(tender.get(field)) for field in TENDER_CARD_FIELDS)
+    with tender_card_cache_lock:
+        cached = tender_card_cache.get(cache_key)
+        if cached is not None:
+            tender_card_cache.move_to_end(cache_key)
+            return cached
+
+    card_parts = COMPACT_TENDER_CARD_PARTS if digest_format == 'compact' else TENDER_CARD_PARTS
+    card_html = render_compiled_template(card_parts, {
+        'tender_name': tender.get('tenderName', 'N/A'),
+        'tender_id': tender.get('tenderId', 'N/A'),
+        'agency_name': tender.get('agencyName', 'N/A'),
+        'activity_name': tender.get('tenderActivityName', 'N/A'),
+        'last_offer_date': format_tender_date(tender.get('lastOfferPresentationDate')),
+        'last_enqueries_date': format_tender_date(tender.get('lastEnqueriesDate')),
+        'submission_date': format_tender_date(tender.get('submitionDate')),
+        'reference_number': tender.get('referenceNumber', 'N/A'),
+        'tender_id_string': tender.get('tenderIdString', '')
+    })
+
+    with tender_card_cache_lock:
+        tender_card_cache[cache_key] = card_html
+        while len(tender_card_cache) > TENDER_CARD_CACHE_MAX_SIZE:
+            tender_card_cache.popitem(last=False)  # Evict the least recently used card
+    return card_html
+
+def build_criteria_html(search_criteria, digest_format='full'):
+    """Build the search criteria section of the email"""
+    item_template = CRITERIA_ITEM_TEMPLATES[digest_format]
+    criteria_items = []
+    if search_criteria.get('agency_name'):
+        criteria_items.append(item_template.format(f'🏛️ Agency: {search_criteria["agency_name"]}'))
+    if search_criteria.get('activity_name'):
+        criteria_items.append(item_template.format(f'⚡ Activity: {search_criteria["activity_name"]}'))
+    if search_criteria.get('keywords'):
+        criteria_items.append(item_template.format(f'🔑 Keywords: {", ".join(search_criteria["keywords"])}'))
+    if search_criteria.get('tender_name'):
+        criteria_items.append(item_template.format(f'📋 Tender Name: {search_criteria["tender_name"]}'))
+    
+    return "".join(criteria_items) if criteria_items else item_template.format('📊 General Alert - All New Tenders')
+
+def render_tender_cards(tenders, digest_format):
+    """Render cards for the given tenders, skipping any that fail to render"""
+    card_fragments = []
+    for tender in tenders:
+        try:
+            card_fragments.append(render_tender_card(tender, digest_format))
         except Exception as e:
             print(f"Error processing tender {tender.get('tenderId', 'Unknown')}: {e}")
             continue
+    return "".join(card_fragments)
+
+def build_overflow_summary(tenders):
+    """Summarise tenders that did not get a full card, grouped by agency"""
+    if not tenders:
+        return ""
     
-    # Format the HTML template
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    body = html_template.format(
-        tender_count=len(tenders),
-        criteria_html=criteria_html,
-        tenders_html=tenders_html,
-        current_time=current_time
-    )
+    groups = {}
+    for tender in tenders:
+        group = groups.setdefault(tender.get('agencyName') or 'N/A', {'count': 0, 'deadline': None})
+        group['count'] += 1
+        deadline = (tender.get('lastOfferPresentationDate') or '').split('.')[0]
+        if deadline and (group['deadline'] is None or deadline < group['deadline']):
+            group['deadline'] = deadline
+    
+    rows = []
+    for agency, group in sorted(groups.items(), key=lambda item: -item[1]['count']):
+        deadline = group['deadline'].replace('T', ' ') if group['deadline'] else 'N/A'
+        rows.append(f'<tr style="border-bottom:1px solid #e9ecef;"><td>{agency}</td><td align="right">{group["count"]}</td><td>{deadline}</td></tr>')
+    
+    return render_compiled_template(COMPACT_OVERFLOW_PARTS, {
+        'overflow_count': len(tenders),
+        'overflow_rows': "\n".join(rows)
+    })
 
-    try:
-        # Send the email using Postmark API
-        client = PostmarkClient(server_token=POSTMARK_API_KEY)
-        
-        # Send to each recipient
-        for email in receiver_emails:
-            response = client.emails.send(
-                From=SENDER_EMAIL,
-                To=email.strip(),
-                Subject=subject,
-                HtmlBody=body
+def build_email_body(tenders, search_criteria, digest_format=None):
+    """Assemble the digest HTML by joining cached tender card fragments"""
+    digest_format = digest_format or EMAIL_DIGEST_FORMAT
+    started = time_module.perf_counter()
+    
+    if digest_format == 'compact':
+        carded_tenders = tenders[:EMAIL_MAX_TENDER_CARDS]
+        overflow_tenders = tenders[EMAIL_MAX_TENDER_CARDS:]
+        body = render_compiled_template(COMPACT_EMAIL_HTML_PARTS, {
+            'tender_count': len(tenders),
+            'criteria_html': build_criteria_html(search_criteria, digest_format),
+            'tenders_html': render_tender_cards(carded_tenders, digest_format),
+            'overflow_html': build_overflow_summary(overflow_tenders),
+            'current_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+    else:
+        carded_tenders, overflow_tenders = tenders, []
+        body = render_compiled_template(EMAIL_HTML_PARTS, {
+            'tender_count': len(tenders),
+            'criteria_html': build_criteria_html(search_criteria, digest_format),
+            'tenders_html': render_tender_cards(tenders, digest_format),
+            'current_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+    
+    build_ms = (time_module.perf_counter() - started) * 1000
+    print(f"[{datetime.now()}] Built {digest_format} digest: {len(tenders)} tenders ({len(carded_tenders)} cards, {len(overflow_tenders)} summarised), {len(body.encode('utf-8')) / 1024:.1f} KB in {build_ms:.1f} ms")
+    return body
+
+EMAIL_SUBJECT = "🎯 New Matching Tenders Found - Signal Alert"
+
+# Postmark accepts at most 500 messages per call to the batch endpoint
+POSTMARK_BATCH_MAX_SIZE = 500
+EMAIL_BATCH_SIZE = min(int(os.getenv('EMAIL_BATCH_SIZE', '500')), POSTMARK_BATCH_MAX_SIZE)
+
+# Point POSTMARK_API_BASE at postmark_stub.py to exercise delivery without sending real mail
+POSTMARK_API_BASE = os.getenv('POSTMARK_API_BASE', 'https://api.postmarkapp.com/')
+POSTMARK_TIMEOUT = float(os.getenv('POSTMARK_TIMEOUT', '30'))
+POSTMARK_MAX_RETRIES = int(os.getenv('POSTMARK_MAX_RETRIES', '2'))
+POSTMARK_RETRY_DELAY_SECONDS = float(os.getenv('POSTMARK_RETRY_DELAY_SECONDS', '2'))
+
+# One long-lived Postmark client shared by every sender so connections are reused
+postmark_client = None
+postmark_client_lock = threading.Lock()
+
+def get_postmark_client():
+    """Return the shared Postmark client, creating it on first use"""
+    global postmark_client
+    with postmark_client_lock:
+        if postmark_client is None:
+            from postmarker.core import PostmarkClient
+            postmark_client = PostmarkClient(
+                server_token=POSTMARK_API_KEY,
+                root_api_url=POSTMARK_API_BASE,
+                timeout=POSTMARK_TIMEOUT
             )
-            print(f"[{datetime.now()}] Email sent to {email.strip()} successfully. Message ID: {response.get('MessageID', 'N/A')}")
+        return postmark_client
+
+def is_transient_postmark_error(error):
+    """True for rate limiting (429), server errors and connection problems worth retrying in place"""
+    http_error = error if isinstance(error, requests.exceptions.HTTPError) else error.__cause__
+    if isinstance(http_error, requests.exceptions.HTTPError) and http_error.response is not None:
+        return http_error.response.status_code == 429 or http_error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def send_postmark_batch(client, emails):
+    """Call the batch endpoint, backing off and retrying on transient errors"""
+    attempt = 0
+    while True:
+        try:
+            return client.emails.send_batch(*emails)
+        except Exception as e:
+            if attempt >= POSTMARK_MAX_RETRIES or not is_transient_postmark_error(e):
+                raise
+            attempt += 1
+            delay = POSTMARK_RETRY_DELAY_SECONDS * 2 ** (attempt - 1)
+            print(f"[{datetime.now()}] Postmark batch hit a transient error ({e}), retry {attempt}/{POSTMARK_MAX_RETRIES} in {delay:g}s")
+            time_module.sleep(delay)
+
+# Per-message ErrorCodes that will fail the same way on every retry: 300 invalid email request,
+# 406 inactive (bounced or unsubscribed) recipient
+POSTMARK_PERMANENT_ERROR_CODES = {300, 406}
+
+def send_email_batch(messages):
+    """Send (task_id, message) pairs through Postmark's batch endpoint and map results back to tasks"""
+    client = get_postmark_client()
+    results = {}
+    
+    for start in range(0, len(messages), POSTMARK_BATCH_MAX_SIZE):
+        chunk = messages[start:start + POSTMARK_BATCH_MAX_SIZE]
+        try:
+            responses = send_postmark_batch(client, [message for _, message in chunk])
+            print(f"[{datetime.now()}] Postmark batch of {len(chunk)} messages sent")
+        except Exception as e:
+            # The whole call failed, so every message in this chunk failed with it
+            print(f"[{datetime.now()}] Postmark batch of {len(chunk)} messages failed: {e}")
+            responses = [{'ErrorCode': -1, 'Message': str(e)} for _ in chunk]
         
-        log_memory_usage("Email sent successfully.")
-    except Exception as e:
-        print(f"Failed to send email to {', '.join(receiver_emails)}: {e}")
-
+        # Postmark returns one result per message, in request order
+        for (task_id, message), response in zip(chunk, responses):
+            results.setdefault(task_id, []).append({
+                'to': message['To'],
+                'error_code': response.get('ErrorCode', 0),
+                'message': response.get('Message', ''),
+                'message_id': response.get('MessageID')
+            })
+    
+    return results
 
-import threading
-from queue import Queue
-import time as time_module
 
-# Background email processing queue
-email_queue = Queue()
+# Background processing lanes: slow crawl/evaluate work never blocks email delivery.
+# Tasks live in the background_task table so they survive restarts and can be drained
+# by any number of worker processes.
+EMAIL_LANE = 'email'                        # Delivery lane: ready-to-send email tasks
+ALERT_PROCESSING_LANE = 'alert_processing'  # Crawl lane: tasks that fetch and filter tenders first
 email_processing_active = False
+background_workers = []
 
-def background_email_processor():
-    """Background worker to process email queue"""
-    global email_processing_active
-    email_processing_active = True
+ALERT_PROCESSING_WORKERS = int(os.getenv('ALERT_PROCESSING_WORKERS', '1'))
+EMAIL_DELIVERY_WORKERS = int(os.getenv('EMAIL_DELIVERY_WORKERS', '2'))
+EMAIL_SEND_RATE = float(os.getenv('EMAIL_SEND_RATE', '50'))    # Messages per second
+EMAIL_SEND_BURST = int(os.getenv('EMAIL_SEND_BURST', '500'))    # Messages allowed in one burst
+
+# Claimed tasks become visible to other workers again once their lease expires
+TASK_VISIBILITY_TIMEOUTS = {
+    EMAIL_LANE: int(os.getenv('EMAIL_TASK_VISIBILITY_TIMEOUT', '300')),
+    ALERT_PROCESSING_LANE: int(os.getenv('ALERT_TASK_VISIBILITY_TIMEOUT', '3600'))
+}
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', '3'))
+TASK_RETRY_DELAY_SECONDS = int(os.getenv('TASK_RETRY_DELAY_SECONDS', '60'))
+TASK_RETENTION_DAYS = int(os.getenv('TASK_RETENTION_DAYS', '7'))
+TASK_POLL_INTERVAL_SECONDS = float(os.getenv('TASK_POLL_INTERVAL_SECONDS', '1'))
+EMAIL_COALESCE_WINDOW_SECONDS = int(os.getenv('EMAIL_COALESCE_WINDOW_SECONDS', '30'))
+
+# Interactive work (a user's own fetch or new alert) is claimed before scheduled digests
+TASK_PRIORITY_INTERACTIVE = 0
+TASK_PRIORITY_SCHEDULED = 10
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace outgoing email"""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time_module.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until the requested tokens are available and return the time waited.
+        Requests larger than the bucket go into debt so the next caller waits them off."""
+        with self.lock:
+            now = time_module.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            wait_time = max(0.0, (min(tokens, self.capacity) - self.tokens) / self.rate)
+            self.tokens -= tokens
+        if wait_time > 0:
+            time_module.sleep(wait_time)
+        return wait_time
+
+email_send_bucket = TokenBucket(EMAIL_SEND_RATE, EMAIL_SEND_BURST)
+
+def enqueue_task(lane, task_id, payload, delay_seconds=0, user_id=None, priority=TASK_PRIORITY_SCHEDULED, recipients=None):
+    """Persist a task in the background_task table, optionally holding it back for `delay_seconds`"""
+    with app.app_context():
+        task = BackgroundTask(
+            task_id=task_id,
+            lane=lane,
+            user_id=user_id,
+            priority=priority,
+            recipients=recipients,
+            payload=json.dumps(payload, ensure_ascii=False, default=str),
+            max_attempts=TASK_MAX_ATTEMPTS,
+            available_at=datetime.utcnow() + timedelta(seconds=delay_seconds)
+        )
+        db.session.add(task)
+        db.session.commit()
+        return task.id
+
+# A task is claimable when it is pending and due, or when its worker's lease has expired
+CLAIMABLE_TASK_CONDITION = """
+    lane = :lane AND attempts < max_attempts AND (
+        (status = 'pending' AND available_at <= :now) OR
+        (status = 'running' AND locked_until < :now)
+    )
+"""
+
+# Claim order: priority first, then round-robin across users within a priority (each user's
+# oldest task, then each user's second oldest, ...), so one user's flood cannot starve others
+CLAIM_CANDIDATES_QUERY = f"""
+    SELECT task.id FROM background_task task
+    JOIN (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY priority, COALESCE(user_id, 0) ORDER BY available_at, id
+        ) AS user_rank
+        FROM background_task
+        WHERE {CLAIMABLE_TASK_CONDITION}
+    ) ranked ON ranked.id = task.id
+    ORDER BY task.priority, ranked.user_rank, task.available_at, task.id
+    LIMIT :limit
+"""
+
+def claim_tasks(lane, limit, worker_name):
+    """Claim up to `limit` tasks for this worker in priority and per-user fair order.
+    Uses FOR UPDATE SKIP LOCKED on Postgres; other databases fall back to guarded per-row updates."""
+    now = datetime.utcnow()
+    params = {
+        'lane': lane,
+        'now': now,
+        'limit': limit,
+        'worker': worker_name,
+        'locked_until': now + timedelta(seconds=TASK_VISIBILITY_TIMEOUTS[lane])
+    }
+    
+    # Tasks whose worker died on the last allowed attempt will never be claimed again
+    db.session.execute(text("""
+        UPDATE background_task SET status = 'failed', locked_until = NULL, updated_at = :now,
+            last_error = COALESCE(last_error, 'Visibility timeout expired on final attempt')
+        WHERE lane = :lane AND status = 'running' AND locked_until < :now AND attempts >= max_attempts
+    """), params)
+    
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.execute(text(f"""
+            UPDATE background_task
+            SET status = 'running', attempts = attempts + 1, locked_by = :worker,
+                locked_until = :locked_until, started_at = :now, updated_at = :now
+            WHERE id IN (
+                {CLAIM_CANDIDATES_QUERY}
+                FOR UPDATE OF task SKIP LOCKED
+            ) AND {CLAIMABLE_TASK_CONDITION}
+            RETURNING id
+        """), params).fetchall()
+        claimed_ids = [row.id for row in rows]
+    else:
+        candidate_ids = [row.id for row in db.session.execute(text(CLAIM_CANDIDATES_QUERY), params)]
+        claimed_ids = []
+        for candidate_id in candidate_ids:
+            result = db.session.execute(text(f"""
+                UPDATE background_task
+                SET status = 'running', attempts = attempts + 1, locked_by = :worker,
+                    locked_until = :locked_until, started_at = :now, updated_at = :now
+                WHERE id = :id AND {CLAIMABLE_TASK_CONDITION}
+            """), dict(params, id=candidate_id))
+            if result.rowcount:
+                claimed_ids.append(candidate_id)
+    db.session.commit()
+    return load_claimed_tasks(claimed_ids)
+
+def load_claimed_tasks(claimed_ids):
+    """Task dicts for claimed task rows, in claim order"""
+    if not claimed_ids:
+        return []
+    
+    tasks_by_id = {task.id: task for task in BackgroundTask.query.filter(BackgroundTask.id.in_(claimed_ids)).all()}
+    tasks = [tasks_by_id[claimed_id] for claimed_id in claimed_ids if claimed_id in tasks_by_id]
+    return [
+        {
+            'id': task.id,
+            'task_id': task.task_id,
+            'user_id': task.user_id,
+            'priority': task.priority,
+            'payload': json.loads(task.payload),
+            'attempts': task.attempts,
+            'max_attempts': task.max_attempts
+        }
+        for task in tasks
+    ]
+
+def task_recipients(emails):
+    """Value of background_task.recipients for an email task's receiver list"""
+    return ','.join(sorted({email.strip().lower() for email in emails if email and email.strip()}))
+
+def claim_recipient_email_tasks(email_tasks, worker_name):
+    """Also claim the pending email tasks of the recipients in `email_tasks`, including ones still held
+    back by the coalescing window, so each recipient gets one digest per window. Only tasks that were
+    never attempted are taken; retries keep their backoff."""
+    recipients = {email.strip().lower() for email_task in email_tasks for email in email_task['payload']['receiver_emails']}
+    claimed = {email_task['id'] for email_task in email_tasks}
+    candidate_ids = [
+        task_id for task_id, task_recipient_list in db.session.query(BackgroundTask.id, BackgroundTask.recipients).filter(
+            BackgroundTask.lane == EMAIL_LANE, BackgroundTask.status == 'pending', BackgroundTask.attempts == 0,
+            BackgroundTask.recipients.isnot(None))
+        if task_id not in claimed and recipients & set(task_recipient_list.split(','))
+    ]
+    if not candidate_ids:
+        db.session.commit()
+        return []
+    
+    now = datetime.utcnow()
+    params = {'worker': worker_name, 'now': now, 'locked_until': now + timedelta(seconds=TASK_VISIBILITY_TIMEOUTS[EMAIL_LANE])}
+    claim = """
+        UPDATE background_task
+        SET status = 'running', attempts = attempts + 1, locked_by = :worker,
+            locked_until = :locked_until, started_at = :now, updated_at = :now
+        WHERE id {condition} AND status = 'pending' AND attempts = 0
+    """
+    if db.engine.dialect.name == 'postgresql':
+        rows = db.session.execute(text(claim.format(condition='= ANY(:ids)') + ' RETURNING id'), dict(params, ids=candidate_ids)).fetchall()
+        claimed_ids = [row.id for row in rows]
+    else:
+        claimed_ids = [candidate_id for candidate_id in candidate_ids
+                       if db.session.execute(text(claim.format(condition='= :id')), dict(params, id=candidate_id)).rowcount]
+    db.session.commit()
+    if claimed_ids:
+        print(f"[{datetime.now()}] Claimed {len(claimed_ids)} pending email tasks early to coalesce them with their recipients' batch")
+    return load_claimed_tasks(claimed_ids)
+
+def task_metric_values(timings=None, tender_count=None):
+    """Column values storing phase durations and tender counts on a task row"""
+    values = {}
+    if timings is not None:
+        values['timings'] = json.dumps({phase: round(duration, 1) for phase, duration in timings.items()})
+    if tender_count is not None:
+        values['tender_count'] = tender_count
+    return values
+
+def update_leased_task(task_row_id, worker_name, values):
+    """Write a claimed task's outcome only while `worker_name` still holds it. Once its lease expired
+    and another worker re-claimed the task, locked_by names that worker and the update is skipped,
+    so a slow worker cannot overwrite the newer run's state. Returns whether the row was updated."""
+    result = db.session.execute(
+        update(BackgroundTask)
+        .where(BackgroundTask.id == task_row_id, BackgroundTask.locked_by == worker_name, BackgroundTask.status == 'running')
+        .values(**values)
+    )
+    db.session.commit()
+    if not result.rowcount:
+        print(f"[{datetime.now()}] Task {task_row_id} is no longer leased to {worker_name}, not recording its {values.get('status')} outcome")
+    return bool(result.rowcount)
+
+def complete_task(task_row_id, worker_name, timings=None, tender_count=None):
+    """Mark a claimed task as finished"""
+    now = datetime.utcnow()
+    return update_leased_task(task_row_id, worker_name, dict(
+        task_metric_values(timings, tender_count),
+        status='done', locked_until=None, finished_at=now, updated_at=now
+    ))
+
+def fail_task(task_row_id, worker_name, error_message, timings=None, tender_count=None, retry_emails=None):
+    """Record a task failure and schedule a retry with exponential backoff while attempts remain.
+    For email tasks, retry_emails is the set of (lowercased) recipients worth retrying: the retry is
+    narrowed to them so accepted recipients are not mailed twice, and an empty set fails the task now."""
+    task = db.session.get(BackgroundTask, task_row_id)
+    if task is None:
+        return False
+    
+    now = datetime.utcnow()
+    values = dict(task_metric_values(timings, tender_count), last_error=error_message[:1000], locked_until=None, updated_at=now)
+    if retry_emails:
+        payload = json.loads(task.payload)
+        payload['receiver_emails'] = [email for email in payload['receiver_emails'] if email.strip().lower() in retry_emails]
+        values['payload'] = json.dumps(payload, ensure_ascii=False, default=str)
+        values['recipients'] = task_recipients(payload['receiver_emails'])
+    if retry_emails is not None and not retry_emails:
+        values.update(status='failed', finished_at=now)
+        message = f"Task {task.task_id} failed permanently, not retrying: {error_message}"
+    elif task.attempts < task.max_attempts:
+        values.update(status='pending', available_at=now + timedelta(seconds=TASK_RETRY_DELAY_SECONDS * 2 ** (task.attempts - 1)))
+        message = f"Task {task.task_id} failed (attempt {task.attempts}/{task.max_attempts}), retrying at {values['available_at']} UTC: {error_message}"
+    else:
+        values.update(status='failed', finished_at=now)
+        message = f"Task {task.task_id} failed permanently after {task.attempts} attempts: {error_message}"
+    
+    # attempts is only read here; a re-claim in between changes locked_by, so the update is skipped
+    if not update_leased_task(task_row_id, worker_name, values):
+        return False
+    print(f"[{datetime.now()}] {message}")
+    return True
+
+def serialize_task(task):
+    """Describe a task's lifecycle and where its time went"""
+    def milliseconds_between(start, end):
+        return round((end - start).total_seconds() * 1000) if start and end else None
+    
+    return {
+        'task_id': task.task_id,
+        'lane': task.lane,
+        'status': task.status,
+        'attempts': task.attempts,
+        'max_attempts': task.max_attempts,
+        'priority': 'interactive' if task.priority <= TASK_PRIORITY_INTERACTIVE else 'scheduled',
+        'enqueued_at': task.created_at.isoformat() if task.created_at else None,
+        'started_at': task.started_at.isoformat() if task.started_at else None,
+        'finished_at': task.finished_at.isoformat() if task.finished_at else None,
+        'queue_wait_ms': milliseconds_between(task.created_at, task.started_at),
+        'run_ms': milliseconds_between(task.started_at, task.finished_at),
+        'timings': json.loads(task.timings) if task.timings else {},
+        'tender_count': task.tender_count,
+        'last_error': task.last_error
+    }
+
+def get_queue_depth(lane=None):
+    """Count tasks that are waiting or in progress"""
+    query = BackgroundTask.query.filter(BackgroundTask.status.in_(['pending', 'running']))
+    if lane:
+        query = query.filter_by(lane=lane)
+    return query.count()
+
+def purge_finished_tasks():
+    """Delete finished tasks older than TASK_RETENTION_DAYS"""
+    cutoff = datetime.utcnow() - timedelta(days=TASK_RETENTION_DAYS)
+    deleted = BackgroundTask.query.filter(
+        BackgroundTask.status.in_(['done', 'failed']),
+        BackgroundTask.updated_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        print(f"[{datetime.now()}] Purged {deleted} finished background tasks older than {TASK_RETENTION_DAYS} days")
+    return deleted
+
+def process_alert_processing_task(alert_task):
+    """Fetch and filter tenders for an 'alert_processing' task, then hand the result to the delivery lane.
+    Returns (timings, tender_count) for the task registry."""
+    payload = alert_task['payload']
+    search_criteria, receiver_emails, task_id = payload['search_criteria'], payload['receiver_emails'], alert_task['task_id']
+    timings = {}
+    
+    print(f"[{datetime.now()}] Processing background alert task {task_id} for {len(receiver_emails)} recipients")
+    
+    # Reuse a recent crawl when it is fresh enough for this task
+    phase_started = time_module.perf_counter()
+    tenders = get_tenders_snapshot(payload.get('max_age_seconds'))
+    timings['fetch_ms'] = (time_module.perf_counter() - phase_started) * 1000
+    
+    phase_started = time_module.perf_counter()
+    filtered_tenders = filter_tenders(tenders, search_criteria)
+    timings['filter_ms'] = (time_module.perf_counter() - phase_started) * 1000
+    
+    if filtered_tenders:
+        add_email_to_queue(filtered_tenders, search_criteria, receiver_emails, task_id,
+                           user_id=alert_task['user_id'], priority=alert_task['priority'])
+        print(f"[{datetime.now()}] Background alert task {task_id} completed successfully - {len(filtered_tenders)} tenders queued for delivery")
+    else:
+        print(f"[{datetime.now()}] Background alert task {task_id} completed - no matching tenders found")
+    
+    return timings, len(filtered_tenders)
+
+def tender_key(tender):
+    """Stable identity for de-duplicating tenders across tasks"""
+    tender_id = tender.get('tenderId')
+    if tender_id is not None:
+        return str(tender_id)
+    return json.dumps(tender, sort_keys=True, ensure_ascii=False, default=str)
+
+def merge_search_criteria(criteria_list):
+    """Merge the search criteria of several coalesced tasks into one for the digest header"""
+    if len(criteria_list) == 1:
+        return criteria_list[0]
+    
+    merged = {'agency_name': [], 'activity_name': [], 'keywords': [], 'tender_name': []}
+    for criteria in criteria_list:
+        for field in merged:
+            values = criteria.get(field)
+            if not values:
+                continue
+            for value in (values if isinstance(values, list) else [values]):
+                if value not in merged[field]:
+                    merged[field].append(value)
+    merged['tender_name'] = ', '.join(merged['tender_name'])
+    return merged
+
+def coalesce_email_tasks(email_tasks):
+    """Merge claimed email tasks into one de-duplicated digest per recipient"""
+    digests = {}
+    for email_task in email_tasks:
+        payload = email_task['payload']
+        for email in payload['receiver_emails']:
+            email = email.strip()
+            if not email:
+                continue
+            digest = digests.setdefault(email.lower(), {
+                'to': email,
+                'tenders': {},
+                'criteria': [],
+                'task_row_ids': []
+            })
+            for tender in payload['tenders']:
+                digest['tenders'].setdefault(tender_key(tender), tender)
+            if payload['search_criteria'] not in digest['criteria']:
+                digest['criteria'].append(payload['search_criteria'])
+            digest['task_row_ids'].append(email_task['id'])
+    return list(digests.values())
+
+def process_email_batch(email_tasks):
+    """Coalesce claimed email tasks per recipient and deliver the digests through one Postmark batch call.
+    Returns a dict mapping each task row id to its error message (None on success), the recipients worth
+    retrying, phase timings and tender count."""
+    outcomes = {
+        email_task['id']: {
+            'error': None,
+            'retry_emails': set(),  # Recipients that failed transiently; permanent rejections are not retried
+            'timings': {'render_ms': 0.0},
+            'tender_count': len(email_task['payload']['tenders'])
+        }
+        for email_task in email_tasks
+    }
+    task_names = {email_task['id']: email_task['task_id'] for email_task in email_tasks}
+    for email_task in email_tasks:
+        print(f"[{datetime.now()}] Processing background email task {email_task['task_id']} for {len(email_task['payload']['receiver_emails'])} recipients")
+    
+    digests = coalesce_email_tasks(email_tasks)
+    print(f"[{datetime.now()}] Coalesced {len(email_tasks)} email tasks into {len(digests)} recipient digests")
+    
+    # Recipients with identical digests share one rendered body
+    body_cache = {}
+    messages = []
+    for digest in digests:
+        search_criteria = merge_search_criteria(digest['criteria'])
+        tenders = list(digest['tenders'].values())
+        try:
+            body_key = (tuple(digest['tenders']), json.dumps(search_criteria, sort_keys=True, ensure_ascii=False, default=str))
+            cached = body_key in body_cache
+            render_ms = 0.0
+            if not cached:
+                render_started = time_module.perf_counter()
+                body_cache[body_key] = build_email_body(tenders, search_criteria)
+                render_ms = (time_module.perf_counter() - render_started) * 1000
+            for task_row_id in digest['task_row_ids']:
+                outcomes[task_row_id]['timings']['render_ms'] += render_ms
+            html_body = body_cache[body_key]
+            print(f"[{datetime.now()}] Digest for {digest['to']}: {len(tenders)} tenders, {len(html_body.encode('utf-8')) / 1024:.1f} KB, built in {render_ms:.1f} ms{' (cached body)' if cached else ''}")
+            messages.append((digest['to'].lower(), {
+                'From': SENDER_EMAIL,
+                'To': digest['to'],
+                'Subject': EMAIL_SUBJECT,
+                'HtmlBody': html_body
+            }))
+        except Exception as e:
+            print(f"[{datetime.now()}] Error building digest for {digest['to']}: {e}")
+            for task_row_id in digest['task_row_ids']:
+                outcomes[task_row_id]['error'] = outcomes[task_row_id]['error'] or f"Render failed for {digest['to']}: {e}"
+                outcomes[task_row_id]['retry_emails'].add(digest['to'].lower())
+    
+    if not messages:
+        return outcomes
+    
+    # Pace delivery with the shared token bucket instead of a fixed sleep per task
+    waited = email_send_bucket.acquire(len(messages))
+    if waited:
+        print(f"[{datetime.now()}] Send rate limit reached, waited {waited:.2f}s")
     
-    print(f"[{datetime.now()}] Background email processor started")
+    print(f"[{datetime.now()}] Sending {len(messages)} emails for {len(email_tasks)} tasks via Postmark batch")
+    send_started = time_module.perf_counter()
+    results = send_email_batch(messages)
+    send_ms = (time_module.perf_counter() - send_started) * 1000
+    for outcome in outcomes.values():
+        outcome['timings']['rate_wait_ms'] = waited * 1000
+        outcome['timings']['send_ms'] = send_ms
+    
+    # Map per-recipient results back to every task that contributed to the digest
+    digests_by_recipient = {digest['to'].lower(): digest for digest in digests}
+    for recipient, recipient_results in results.items():
+        failed = [result for result in recipient_results if result['error_code']]
+        if not failed:
+            continue
+        permanent = all(result['error_code'] in POSTMARK_PERMANENT_ERROR_CODES for result in failed)
+        error_message = f"Delivery failed for {recipient} ({failed[0]['message']}){' - not retryable' if permanent else ''}"
+        for task_row_id in digests_by_recipient[recipient]['task_row_ids']:
+            outcomes[task_row_id]['error'] = outcomes[task_row_id]['error'] or error_message
+            if not permanent:
+                outcomes[task_row_id]['retry_emails'].add(recipient)
+    
+    for task_row_id, outcome in outcomes.items():
+        if outcome['error']:
+            print(f"[{datetime.now()}] Background email task {task_names[task_row_id]} failed: {outcome['error']}")
+        else:
+            print(f"[{datetime.now()}] Background email task {task_names[task_row_id]} completed successfully")
+    
+    log_memory_usage("Email batch sent.")
+    return outcomes
+
+def background_alert_processor():
+    """Crawl lane worker: fetches and filters tenders for alert processing tasks"""
+    worker_name = f"{os.getpid()}-{threading.current_thread().name}"
+    print(f"[{datetime.now()}] Background alert processor {worker_name} started")
     
     while email_processing_active:
         try:
-            # Get email task from queue with timeout
-            try:
-                email_task = email_queue.get(timeout=1)  # 1 second timeout
-            except:
-                continue  # No tasks, continue loop
-            
-            if email_task:
-                task_type = email_task[0] if len(email_task) > 0 else 'email'
+            with app.app_context():
+                alert_tasks = claim_tasks(ALERT_PROCESSING_LANE, 1, worker_name)
+                if not alert_tasks:
+                    time_module.sleep(TASK_POLL_INTERVAL_SECONDS)  # No tasks, continue loop
+                    continue
                 
-                if task_type == 'alert_processing':
-                    # Handle alert processing task
-                    search_criteria, receiver_emails, task_id = email_task[1:]
-                    
-                    print(f"[{datetime.now()}] Processing background alert task {task_id} for {len(receiver_emails)} recipients")
-                    
+                for alert_task in alert_tasks:
                     try:
-                        # Fetch tenders in the background
-                        tenders = fetch_tenders()
-                        filtered_tenders = filter_tenders(tenders, search_criteria)
-                        
-                        if filtered_tenders:
-                            # Add delay before sending to avoid overwhelming the email service
-                            time_module.sleep(5)
-                            
-                            # Send the email
-                            send_email(filtered_tenders, search_criteria, receiver_emails)
-                            
-                            print(f"[{datetime.now()}] Background alert task {task_id} completed successfully - {len(filtered_tenders)} tenders sent")
-                        else:
-                            print(f"[{datetime.now()}] Background alert task {task_id} completed - no matching tenders found")
-                        
+                        timings, tender_count = process_alert_processing_task(alert_task)
+                        complete_task(alert_task['id'], worker_name, timings, tender_count)
                     except Exception as e:
-                        print(f"[{datetime.now()}] Error in background alert task {task_id}: {e}")
-                    
-                    finally:
-                        # Mark task as done
-                        email_queue.task_done()
-                        
-                else:
-                    # Handle regular email task
-                    tenders, search_criteria, receiver_emails, task_id = email_task
-                    
-                    print(f"[{datetime.now()}] Processing background email task {task_id} for {len(receiver_emails)} recipients")
-                    
-                    try:
-                        # Add delay before sending to avoid overwhelming the email service
-                        time_module.sleep(5)
-                        
-                        # Send the email
-                        send_email(tenders, search_criteria, receiver_emails)
-                        
-                        print(f"[{datetime.now()}] Background email task {task_id} completed successfully")
-                        
-                    except Exception as e:
-                        print(f"[{datetime.now()}] Error in background email task {task_id}: {e}")
-                    
-                    finally:
-                        # Mark task as done
-                        email_queue.task_done()
+                        print(f"[{datetime.now()}] Error in background alert task {alert_task['task_id']}: {e}")
+                        db.session.rollback()
+                        fail_task(alert_task['id'], worker_name, str(e))
+                
+        except Exception as e:
+            print(f"[{datetime.now()}] Error in background alert processor: {e}")
+            time_module.sleep(5)  # Wait before continuing
+    
+    print(f"[{datetime.now()}] Background alert processor {worker_name} stopped")
+
+def background_email_processor():
+    """Delivery lane worker: sends claimed email tasks in Postmark batches"""
+    worker_name = f"{os.getpid()}-{threading.current_thread().name}"
+    print(f"[{datetime.now()}] Background email processor {worker_name} started")
+    
+    while email_processing_active:
+        try:
+            with app.app_context():
+                # Claim every email task that is already waiting as one batch
+                email_tasks = claim_tasks(EMAIL_LANE, EMAIL_BATCH_SIZE, worker_name)
+                if not email_tasks:
+                    time_module.sleep(TASK_POLL_INTERVAL_SECONDS)  # No tasks, continue loop
+                    continue
+                email_tasks += claim_recipient_email_tasks(email_tasks, worker_name)
+                
+                try:
+                    outcomes = process_email_batch(email_tasks)
+                except Exception as e:
+                    print(f"[{datetime.now()}] Error sending email batch: {e}")
+                    outcomes = {email_task['id']: {'error': str(e), 'retry_emails': None, 'timings': None, 'tender_count': None}
+                                for email_task in email_tasks}
+                
+                for task_row_id, outcome in outcomes.items():
+                    if outcome['error']:
+                        fail_task(task_row_id, worker_name, outcome['error'], outcome['timings'], outcome['tender_count'], outcome['retry_emails'])
+                    else:
+                        complete_task(task_row_id, worker_name, outcome['timings'], outcome['tender_count'])
                     
         except Exception as e:
             print(f"[{datetime.now()}] Error in background email processor: {e}")
             time_module.sleep(5)  # Wait before continuing
     
-    print(f"[{datetime.now()}] Background email processor stopped")
+    print(f"[{datetime.now()}] Background email processor {worker_name} stopped")
 
 def start_background_email_processor():
-    """Start the background email processor thread"""
-    if not email_processing_active:
-        email_thread = threading.Thread(target=background_email_processor, daemon=True)
-        email_thread.start()
-        print(f"[{datetime.now()}] Background email processor thread started")
-        return email_thread
-    return None
+    """Start the crawl and delivery worker pools"""
+    global email_processing_active
+    if email_processing_active:
+        return None
+    
+    email_processing_active = True
+    background_workers.clear()
+    for index in range(ALERT_PROCESSING_WORKERS):
+        background_workers.append(threading.Thread(target=background_alert_processor, name=f"alert-worker-{index + 1}", daemon=True))
+    for index in range(EMAIL_DELIVERY_WORKERS):
+        background_workers.append(threading.Thread(target=background_email_processor, name=f"email-worker-{index + 1}", daemon=True))
+    for worker in background_workers:
+        worker.start()
+    
+    print(f"[{datetime.now()}] Background workers started: {ALERT_PROCESSING_WORKERS} alert processing, {EMAIL_DELIVERY_WORKERS} email delivery at {EMAIL_SEND_RATE:g} emails/s")
+    return background_workers
 
-def add_email_to_queue(tenders, search_criteria, receiver_emails, task_id=None):
-    """Add an email task to the background processing queue"""
+def add_email_to_queue(tenders, search_criteria, receiver_emails, task_id=None, user_id=None, priority=TASK_PRIORITY_SCHEDULED):
+    """Add an email task to the persistent background queue"""
     if task_id is None:
         task_id = f"task_{int(time_module.time())}"
     
-    email_task = (tenders, search_criteria, receiver_emails, task_id)
-    email_queue.put(email_task)
+    # Hold scheduled email tasks back for the coalescing window; interactive ones go out immediately.
+    # Whichever task of a recipient is claimed first pulls in the recipient's other pending tasks
+    # (claim_recipient_email_tasks), so they are sent as one digest.
+    delay_seconds = EMAIL_COALESCE_WINDOW_SECONDS if priority >= TASK_PRIORITY_SCHEDULED else 0
+    enqueue_task(EMAIL_LANE, task_id, {
+        'tenders': tenders,
+        'search_criteria': search_criteria,
+        'receiver_emails': receiver_emails
+    }, delay_seconds=delay_seconds, user_id=user_id, priority=priority, recipients=task_recipients(receiver_emails))
     print(f"[{datetime.now()}] Email task {task_id} added to background queue")
     return task_id
 
-def add_alert_to_background_queue(search_criteria, receiver_emails, task_id=None):
-    """Add an alert processing task to the background queue"""
+def add_alert_to_background_queue(search_criteria, receiver_emails, task_id=None, user_id=None, priority=TASK_PRIORITY_INTERACTIVE,
+                                   max_age_seconds=None):
+    """Add an alert processing task to the persistent background queue"""
     if task_id is None:
         task_id = f"alert_{int(time_module.time())}"
     
     # Create an alert task that will fetch tenders and send emails in the background
-    alert_task = ('alert_processing', search_criteria, receiver_emails, task_id)
-    email_queue.put(alert_task)
+    # max_age_seconds is how stale a tender snapshot the task accepts (None uses TENDER_SNAPSHOT_MAX_AGE_SECONDS)
+    enqueue_task(ALERT_PROCESSING_LANE, task_id, {
+        'search_criteria': search_criteria,
+        'receiver_emails': receiver_emails,
+        'max_age_seconds': max_age_seconds
+    }, user_id=user_id, priority=priority)
     print(f"[{datetime.now()}] Alert processing task {task_id} added to background queue")
     return task_id
 
-def process_alert(alert):
-    keywords = {
-        'agency_name': alert.keyword if alert.keyword_type == 'agency' else '',
-        'activity_name': alert.keyword if alert.keyword_type == 'activity' else '',
+ALERT_RUN_MAX_WORKERS = int(os.getenv('ALERT_RUN_MAX_WORKERS', '4'))
+
+# Per-alert schedules. An alert's schedule is a five-field cron expression evaluated in
+# ALERT_SCHEDULE_TIMEZONE ("0 * * * *"), an interval ("every 30m", "every 6h", "every 7d")
+# or a preset name. The dispatcher job runs every ALERT_DISPATCH_INTERVAL_MINUTES and
+# evaluates only alerts whose next_run_at has passed, all against one shared snapshot.
+ALERT_SCHEDULE_TIMEZONE = os.getenv('ALERT_SCHEDULE_TIMEZONE', 'Asia/Riyadh')
+ALERT_DEFAULT_SCHEDULE = os.getenv('ALERT_DEFAULT_SCHEDULE', '33 12 * * *')  # The original daily run
+ALERT_DISPATCH_INTERVAL_MINUTES = int(os.getenv('ALERT_DISPATCH_INTERVAL_MINUTES', '5'))
+ALERT_MIN_INTERVAL_MINUTES = int(os.getenv('ALERT_MIN_INTERVAL_MINUTES', '15'))
+ALERT_SCHEDULE_PRESETS = {
+    'hourly': '0 * * * *',
+    'daily': ALERT_DEFAULT_SCHEDULE,
+    'weekly': '33 12 * * sun'
+}
+ALERT_INTERVAL_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+CRON_WEEKDAY_NAMES = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+def normalize_cron_weekdays(field):
+    """Rewrite a crontab day-of-week field with day names. APScheduler numbers days from
+    Monday (0=mon) and rejects wrapping ranges, while crontab uses 0/7=sun, so "0 8 * * 0",
+    "sun-thu" or "*/2" would otherwise run on the wrong days or fail to parse. Steps are
+    expanded over crontab's 0-7 range into explicit days."""
+    def is_day(token):
+        return token.isdigit() and int(token) <= 7 or token in CRON_WEEKDAY_NAMES
+    
+    def day_index(token):
+        return int(token) if token.isdigit() else CRON_WEEKDAY_NAMES.index(token)
+    
+    parts = []
+    for part in field.split(','):
+        base, _, step = part.partition('/')
+        bounds = base.split('-')
+        if part == '*' or not (base == '*' or len(bounds) <= 2 and all(is_day(b) for b in bounds)):
+            parts.append(part)  # Leave wildcards and anything unrecognised to APScheduler
+            continue
+        if step and (not step.isdigit() or int(step) == 0):
+            raise ValueError(f"Invalid day-of-week step in '{part}'")
+        if base == '*':
+            start, end = 0, 7
+        else:
+            start = day_index(bounds[0])
+            # "n/step" runs from n to the end of the week, as in crontab
+            end = day_index(bounds[1]) if len(bounds) == 2 else 7 if step else start
+            if end < start:
+                end += 7  # Wrapping range such as fri-mon
+        parts.extend(CRON_WEEKDAY_NAMES[day % 7] for day in range(start, end + 1, int(step or 1)))
+    return ','.join(dict.fromkeys(parts))
+
+def parse_alert_schedule(schedule):
+    """Parse a schedule string into a timedelta (intervals) or a CronTrigger.
+    Raises ValueError for anything that is not a valid schedule."""
+    schedule = (schedule or ALERT_DEFAULT_SCHEDULE).strip().lower()
+    schedule = ALERT_SCHEDULE_PRESETS.get(schedule, schedule)
+    
+    if schedule.startswith('every '):
+        amount, unit = schedule[len('every '):].strip()[:-1], schedule[-1]
+        if not amount.isdigit() or unit not in ALERT_INTERVAL_UNITS:
+            raise ValueError(f"Invalid interval '{schedule}', expected e.g. 'every 30m', 'every 6h' or 'every 7d'")
+        interval = timedelta(**{ALERT_INTERVAL_UNITS[unit]: int(amount)})
+        if interval < timedelta(minutes=ALERT_MIN_INTERVAL_MINUTES):
+            raise ValueError(f"Alert interval must be at least {ALERT_MIN_INTERVAL_MINUTES} minutes")
+        return interval
+    
+    fields = schedule.split()
+    if len(fields) != 5:
+        raise ValueError(f"Invalid schedule '{schedule}', expected a five-field cron expression, an interval or one of {', '.join(ALERT_SCHEDULE_PRESETS)}")
+    minute, hour, day, month, day_of_week = fields
+    from apscheduler.triggers.cron import CronTrigger
+    return CronTrigger(minute=minute, hour=hour, day=day, month=month, day_of_week=normalize_cron_weekdays(day_of_week),
+                       timezone=pytz.timezone(ALERT_SCHEDULE_TIMEZONE))
+
+def compute_next_alert_run(schedule, after=None):
+    """Next UTC run time strictly after `after` (default now) for a schedule string.
+    Raises ValueError for a schedule that does not parse."""
+    after = after or datetime.utcnow()
+    parsed = parse_alert_schedule(schedule)
+    if isinstance(parsed, timedelta):
+        # Intervals run on a shared grid rather than from each alert's creation time, so alerts
+        # with the same interval fall due together and share one crawl
+        anchor = alert_interval_anchor()
+        return anchor + ((after - anchor) // parsed + 1) * parsed
+    next_fire = parsed.get_next_fire_time(None, pytz.utc.localize(after) + timedelta(seconds=1))
+    return next_fire.astimezone(pytz.utc).replace(tzinfo=None)
+
+def alert_interval_anchor():
+    """UTC instant interval grids start from: midnight of a Sunday in the schedule timezone,
+    so "every 6h" fires at 00:00, 06:00, ... local time and "every 1w" on Sundays"""
+    local_midnight = pytz.timezone(ALERT_SCHEDULE_TIMEZONE).localize(datetime(2024, 1, 7))
+    return local_midnight.astimezone(pytz.utc).replace(tzinfo=None)
+
+def alert_schedule_period(schedule, after=None):
+    """Time between two consecutive runs of a schedule, starting from its next run after `after`"""
+    next_run = compute_next_alert_run(schedule, after)
+    return compute_next_alert_run(schedule, next_run) - next_run
+
+def initialize_alert_schedules():
+    """Give alerts without a next_run_at (existing rows, or schedule changes) their next slot
+    rather than running them all at the next dispatch"""
+    now = datetime.utcnow()
+    pending = Alert.query.filter(Alert.next_run_at.is_(None),
+                                 db.or_(Alert.run_status.is_(None), Alert.run_status != 'invalid')).all()
+    for alert in pending:
+        try:
+            alert.next_run_at = compute_next_alert_run(alert.schedule, now)
+        except ValueError as e:
+            for column, value in build_alert_schedule_error_update(alert, e, alert.last_run_date).items():
+                setattr(alert, column, value)
+    if pending:
+        db.session.commit()
+        print(f"[{datetime.now()}] Scheduled first runs for {len(pending)} alerts")
+    return len(pending)
+
+# Per-alert retries: a failed alert is retried on its own with exponential backoff (30m, 60m, ...)
+# until ALERT_MAX_ATTEMPTS, then waits for its next regular slot. Alerts that succeeded in
+# the same run have already moved on to their next slot, so they are never re-evaluated.
+ALERT_MAX_ATTEMPTS = int(os.getenv('ALERT_MAX_ATTEMPTS', '3'))
+ALERT_RETRY_DELAY_MINUTES = int(os.getenv('ALERT_RETRY_DELAY_MINUTES', '30'))
+
+# Columns loaded for an alert run: enough to evaluate an alert and compute its bookkeeping
+# without materializing ORM objects, since the outcomes are written back in one bulk UPDATE
+ALERT_RUN_COLUMNS = (
+    Alert.id, Alert.keyword, Alert.keyword_type, Alert.user_id,
+    Alert.schedule, Alert.last_run_date, Alert.run_attempts, Alert.next_retry_at
+)
+
+def build_alert_schedule_error_update(alert, error, last_run_date):
+    """Bookkeeping values for an alert whose stored schedule does not parse: it stops running and
+    shows the error until the schedule is fixed, rather than silently running on another schedule"""
+    print(f"[{datetime.now()}] Alert {alert.id} has an invalid schedule '{alert.schedule}': {error}")
+    return {
+        'id': alert.id,
+        'last_run_date': last_run_date,
+        'run_status': 'invalid',
+        'run_attempts': 0,
+        'last_error': f"Invalid schedule '{alert.schedule}': {error}"[:2000],
+        'next_retry_at': None,
+        'next_run_at': None
+    }
+
+def build_alert_success_update(alert, now):
+    """Bookkeeping values for an alert that was evaluated: move it to its next scheduled slot"""
+    try:
+        next_run_at = compute_next_alert_run(alert.schedule, now)
+    except ValueError as e:
+        return build_alert_schedule_error_update(alert, e, now)
+    return {
+        'id': alert.id,
+        'last_run_date': now,
+        'run_status': 'success',
+        'run_attempts': 0,
+        'last_error': None,
+        'next_retry_at': None,
+        'next_run_at': next_run_at
+    }
+
+def build_alert_failure_update(alert, error, now):
+    """Bookkeeping values for a failed evaluation, scheduling a retry for this alert only"""
+    # A failure on a regular run starts a new retry sequence
+    attempt = (alert.run_attempts or 0) + 1 if alert.next_retry_at else 1
+    try:
+        next_regular_run = compute_next_alert_run(alert.schedule, now)
+    except ValueError as e:
+        return build_alert_schedule_error_update(alert, e, alert.last_run_date)
+    values = {
+        'id': alert.id,
+        'last_run_date': alert.last_run_date,
+        'run_attempts': attempt,
+        'last_error': str(error)[:2000]
+    }
+    
+    if attempt < ALERT_MAX_ATTEMPTS:
+        next_retry_at = now + timedelta(minutes=ALERT_RETRY_DELAY_MINUTES * 2 ** (attempt - 1))
+        values.update(run_status='retrying', next_retry_at=next_retry_at, next_run_at=min(next_retry_at, next_regular_run))
+        print(f"[{datetime.now()}] Alert {alert.id} failed (attempt {attempt}/{ALERT_MAX_ATTEMPTS}), retrying at {next_retry_at}")
+    else:
+        values.update(run_status='failed', next_retry_at=None, next_run_at=next_regular_run)
+        print(f"[{datetime.now()}] Alert {alert.id} failed {attempt} times, giving up until {next_regular_run}")
+    return values
+
+def record_alert_success(alert, now=None):
+    """Apply success bookkeeping to a loaded Alert"""
+    for column, value in build_alert_success_update(alert, now or datetime.utcnow()).items():
+        setattr(alert, column, value)
+
+def record_alert_failure(alert, error, now=None):
+    """Apply failure bookkeeping to a loaded Alert. Returns the attempt number."""
+    for column, value in build_alert_failure_update(alert, error, now or datetime.utcnow()).items():
+        setattr(alert, column, value)
+    return alert.run_attempts
+
+def apply_alert_updates(updates):
+    """Write per-alert outcomes with one executemany UPDATE keyed on the primary key.
+    Every update dict carries the same columns, so SQLAlchemy sends a single statement."""
+    if updates:
+        db.session.execute(update(Alert), updates)
+    return len(updates)
+
+def record_alert_failures(alert_ids, error):
+    """Record the same failure (e.g. the crawl failed) for a set of alerts in one commit"""
+    now = datetime.utcnow()
+    with app.app_context():
+        try:
+            alerts = db.session.query(*ALERT_RUN_COLUMNS).filter(Alert.id.in_(alert_ids)).all()
+            apply_alert_updates([build_alert_failure_update(alert, error, now) for alert in alerts])
+            db.session.commit()
+        except Exception as e:
+            print(f"[{datetime.now()}] Error recording alert failures: {e}")
+            db.session.rollback()
+
+def build_alert_search_criteria(alert):
+    """Prepare the filter_tenders search criteria for a stored alert"""
+    return {
+        'agency_name': [alert.keyword] if alert.keyword_type == 'agency' else '',
+        'activity_name': [alert.keyword] if alert.keyword_type == 'activity' else '',
         'tender_name': alert.keyword if alert.keyword_type == 'tender' else '',
         'keywords': alert.keyword.split(',') if alert.keyword_type == 'keyword' else []
     }
 
+def group_alert_recipients(alert_ids):
+    """Group the recipients of the given alerts with one SQL GROUP BY.
+    Returns (email, alert ids, owner user id or None when several users share the receiver)."""
+    if not alert_ids:
+        return []
+    rows = db.session.query(
+        AlertRecipient.email,
+        db.func.aggregate_strings(db.cast(AlertRecipient.alert_id, db.String), ','),
+        db.func.count(db.distinct(Alert.user_id)),
+        db.func.min(Alert.user_id)
+    ).join(Alert, Alert.id == AlertRecipient.alert_id) \
+     .filter(AlertRecipient.alert_id.in_(alert_ids)) \
+     .group_by(AlertRecipient.email).all()
+    return [
+        (email, [int(alert_id) for alert_id in grouped_ids.split(',')], owner_id if owner_count == 1 else None)
+        for email, grouped_ids, owner_count, owner_id in rows
+    ]
+
+def scheduled_snapshot_max_age(schedules, now):
+    """Snapshot staleness a run accepts: the shortest period among the schedules being run, capped
+    at SCHEDULED_SNAPSHOT_MAX_AGE_SECONDS. No alert sees a crawl older than its own period, and
+    alerts that run rarely do not force a crawl on every dispatch."""
+    periods = []
+    for schedule in set(schedules):
+        try:
+            periods.append(alert_schedule_period(schedule, now).total_seconds())
+        except Exception as e:
+            print(f"[{datetime.now()}] Could not compute the period of schedule '{schedule}': {e}")
+    return int(min(periods + [SCHEDULED_SNAPSHOT_MAX_AGE_SECONDS]))
+
+def load_tender_first_seen():
+    """tender_id -> first_seen_at from the tender store, or None when the store is unavailable"""
     try:
-        tenders = fetch_tenders()
-        filtered_tenders = filter_tenders(tenders, keywords)
+        with app.app_context():
+            return dict(db.session.query(Tender.tender_id, Tender.first_seen_at).all())
+    except Exception as e:
+        print(f"[{datetime.now()}] Could not load tender first-seen times, alerts get every match this run: {e}")
+        return None
 
-        if filtered_tenders:
-            receiver_emails = alert.emails.split(',')
-            
-            # Add email to background queue instead of sending immediately
-            task_id = add_email_to_queue(filtered_tenders, keywords, receiver_emails, f"alert_{alert.id}")
+def filter_new_tenders(tenders, first_seen, since, now):
+    """Keep the tenders first seen after `since`. Tenders the store has not recorded count as
+    first seen `now`, so a failed store write never drops a match."""
+    if since is None or first_seen is None:
+        return tenders
+    return [tender for tender in tenders if first_seen.get(str(tender.get('tenderId')), now) > since]
+
+def run_alert_shard(user_id, alert_ids, tenders, now, first_seen=None):
+    """Evaluate one user's alerts against the shared snapshot in an isolated session.
+    Each alert only matches tenders first seen since its last run (per `first_seen`, see
+    load_tender_first_seen). The shard only reads; it returns the matching tenders per alert,
+    counters and the per-alert bookkeeping updates, which run_all_alerts groups and writes for
+    the whole run at once."""
+    shard = {
+        'user_id': user_id,
+        'matches': {},  # alert id -> matching tenders
+        'alert_updates': [],
+        'alerts_processed': 0,
+        'alerts_failed': 0,
+        'alerts_retried': 0
+    }
+    
+    # Each shard runs in its own app context, so it gets its own session and connection
+    with app.app_context():
+        try:
+            alerts = db.session.query(*ALERT_RUN_COLUMNS).filter(Alert.id.in_(alert_ids)).all()
+        except Exception as shard_error:
+            # Nothing is recorded, so the whole shard stays due and runs at the next dispatch
+            print(f"[{datetime.now()}] Error loading alert shard for user {user_id}: {shard_error}")
+            shard['alerts_failed'] = len(alert_ids)
+            return shard
+        finally:
+            db.session.close()
+    
+    for alert in alerts:
+        try:
+            parse_alert_schedule(alert.schedule)
+        except ValueError as schedule_error:
+            shard['alert_updates'].append(build_alert_schedule_error_update(alert, schedule_error, alert.last_run_date))
+            shard['alerts_failed'] += 1
+            continue
+        if alert.next_retry_at:
+            shard['alerts_retried'] += 1
+        try:
+            keywords = build_alert_search_criteria(alert)
+            print(f"[{datetime.now()}] Processing alert ID: {alert.id}")
+            print(f"[{datetime.now()}] Search Criteria for alert ID {alert.id}: {keywords}")
             
-            # Update alert status to show email is queued
-            alert.last_run_date = datetime.utcnow()
-            alert.status = 'email_queued'  # Add this field to Alert model if needed
-            db.session.commit()
+            filtered_tenders = filter_new_tenders(filter_tenders(tenders, keywords), first_seen, alert.last_run_date, now)
+            print(f"[{datetime.now()}] Filtered tenders for alert ID {alert.id}: {len(filtered_tenders)} new tenders found.")
             
-            print(f"Email for alert ID {alert.id} added to background queue (task: {task_id})")
-        else:
-            print(f"No matching tenders found for alert ID {alert.id}.")
+            if filtered_tenders:
+                shard['matches'][alert.id] = filtered_tenders
             
-    except Exception as e:
-        error_message = str(e)
-        print(f"[{datetime.now()}] Error processing alert ID {alert.id}: {error_message}")
-        
-        # Update alert status to show error
-        alert.status = 'error'  # Add this field to Alert model if needed
-        alert.last_error = error_message  # Add this field to Alert model if needed
-        db.session.commit()
+            shard['alert_updates'].append(build_alert_success_update(alert, now))
+            shard['alerts_processed'] += 1
+        except Exception as alert_error:
+            print(f"[{datetime.now()}] Unexpected error processing alert ID {alert.id}: {alert_error}")
+            shard['alert_updates'].append(build_alert_failure_update(alert, alert_error, now))
+            shard['alerts_failed'] += 1
+    
+    return shard
 
-from collections import defaultdict
+# Scheduler telemetry: the live APScheduler instance, the retry state of the main job and a
+# bounded history of alert runs, exposed through /scheduler_status and /scheduler_details.
+SCHEDULER_RUN_HISTORY_SIZE = int(os.getenv('SCHEDULER_RUN_HISTORY_SIZE', '50'))
 
-def run_all_alerts():
-    """Run all alerts with proper database connection handling and error recovery"""
+scheduler = None  # Set by start_scheduler
+scheduler_job_status = {
+    'last_success': None,
+    'last_failure': None
+}
+scheduler_run_history = deque(maxlen=SCHEDULER_RUN_HISTORY_SIZE)
+scheduler_run_history_lock = threading.Lock()
+
+def begin_scheduler_run(trigger):
+    """Start a run record for run_all_alerts"""
+    return {
+        'trigger': trigger,
+        'instance_id': INSTANCE_ID,
+        'started_at': datetime.now(),
+        'finished_at': None,
+        'duration_ms': None,
+        'status': 'running',
+        'error': None,
+        'phases_ms': {},
+        'alerts_evaluated': 0,
+        'alerts_failed': 0,
+        'user_shards': 0,
+        'tenders_fetched': 0,
+        'emails_queued': 0,
+        'alerts_retried': 0,
+        '_phase_started': time_module.perf_counter(),
+        '_run_started': time_module.perf_counter()
+    }
+
+def mark_scheduler_run_phase(run, phase):
+    """Record how long the phase that just ended took"""
+    now = time_module.perf_counter()
+    run['phases_ms'][phase] = round((now - run['_phase_started']) * 1000, 1)
+    run['_phase_started'] = now
+
+def finish_scheduler_run(run, status, error=None, record=True):
+    """Close a run record and append it to the history"""
+    run['finished_at'] = datetime.now()
+    run['duration_ms'] = round((time_module.perf_counter() - run['_run_started']) * 1000, 1)
+    run['status'] = status
+    run['error'] = error
+    if not record:
+        return run
+    with scheduler_run_history_lock:
+        scheduler_run_history.append(run)
+    print(f"[{datetime.now()}] Alert run {status} in {run['duration_ms']:.0f}ms: {run['phases_ms']}")
+    return run
+
+def serialize_scheduler_run(run):
+    """JSON-friendly view of a run record"""
+    data = {key: value for key, value in run.items() if not key.startswith('_')}
+    data['started_at'] = run['started_at'].isoformat()
+    data['finished_at'] = run['finished_at'].isoformat() if run['finished_at'] else None
+    return data
+
+def get_scheduler_run_history(limit=None):
+    """Most recent runs first"""
+    with scheduler_run_history_lock:
+        runs = list(scheduler_run_history)
+    runs.reverse()
+    return [serialize_scheduler_run(run) for run in runs[:limit]]
+
+def summarize_scheduler_runs():
+    """Latency and volume trends over the runs kept in memory"""
+    with scheduler_run_history_lock:
+        runs = [run for run in scheduler_run_history if run['duration_ms'] is not None]
+    if not runs:
+        return {'runs': 0}
+    
+    durations = sorted(run['duration_ms'] for run in runs)
+    phase_totals = defaultdict(float)
+    for run in runs:
+        for phase, duration in run['phases_ms'].items():
+            phase_totals[phase] += duration
+    return {
+        'runs': len(runs),
+        'failed_runs': sum(1 for run in runs if run['status'] == 'failed'),
+        'avg_duration_ms': round(sum(durations) / len(durations), 1),
+        'p95_duration_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+        'max_duration_ms': durations[-1],
+        'avg_phases_ms': {phase: round(total / len(runs), 1) for phase, total in phase_totals.items()},
+        'avg_alerts_evaluated': round(sum(run['alerts_evaluated'] for run in runs) / len(runs), 1),
+        'avg_emails_queued': round(sum(run['emails_queued'] for run in runs) / len(runs), 1)
+    }
+
+def run_all_alerts(trigger='manual', due_only=False):
+    """Run alerts as user shards on a bounded thread pool and send one grouped digest per receiver.
+    With due_only, only alerts whose schedule is due are evaluated (the dispatcher's mode).
+    Returns the run record that is also kept in the scheduler run history."""
+    run = begin_scheduler_run(trigger)
     try:
         with app.app_context():
             # Ensure database connection is healthy before proceeding
             if not ensure_database_connection():
                 print(f"[{datetime.now()}] Failed to establish database connection, aborting run_all_alerts")
-                return
+                return finish_scheduler_run(run, 'failed', 'Database connection unavailable')
             
             print(f"[{datetime.now()}] Database connection verified, proceeding with alert processing")
+            mark_scheduler_run_phase(run, 'db_check')
             
-            alerts = Alert.query.all()  # Fetch all alerts from the database
-            tenders_by_receiver = defaultdict(list)  # Dictionary to group tenders by email receiver
-
-            for alert in alerts:
+            initialize_alert_schedules()
+            alert_query = db.session.query(Alert.id, Alert.user_id, Alert.schedule)
+            if due_only:
+                alert_query = alert_query.filter(Alert.next_run_at <= datetime.utcnow())
+            
+            # Shard alerts by owner so one user's slow or failing alerts cannot hold up everyone else
+            alert_ids_by_user = defaultdict(list)
+            schedules = set()
+            for alert_id, user_id, schedule in alert_query.all():
+                alert_ids_by_user[user_id].append(alert_id)
+                schedules.add(schedule)
+            db.session.close()  # Release the connection while the shards run
+            mark_scheduler_run_phase(run, 'load_alerts')
+        
+        if not alert_ids_by_user:
+            # Nothing is due, so skip the crawl; idle dispatches are not kept in the history
+            print(f"[{datetime.now()}] No alerts to process.")
+            return finish_scheduler_run(run, 'idle', record=False)
+        
+        # Every shard shares one crawl
+        try:
+            tenders = get_tenders_snapshot(scheduled_snapshot_max_age(schedules, datetime.utcnow()))
+        except Exception as e:
+            print(f"[{datetime.now()}] Error fetching tenders for alert run: {e}")
+            # Every alert in this run failed; each one retries on its own backoff
+            record_alert_failures([alert_id for ids in alert_ids_by_user.values() for alert_id in ids], f'Error fetching tenders: {e}')
+            mark_scheduler_run_phase(run, 'snapshot')
+            return finish_scheduler_run(run, 'failed', f'Error fetching tenders: {e}')
+        run['tenders_fetched'] = len(tenders)
+        first_seen = load_tender_first_seen()
+        mark_scheduler_run_phase(run, 'snapshot')
+        
+        matches = {}  # Alert id -> matching tenders
+        alert_updates = []  # Per-alert bookkeeping, written once for the whole run
+        alerts_processed = alerts_failed = 0
+        evaluated_at = datetime.utcnow()
+        run['user_shards'] = len(alert_ids_by_user)
+        
+        print(f"[{datetime.now()}] Running {sum(len(ids) for ids in alert_ids_by_user.values())} alerts in {len(alert_ids_by_user)} user shards on {ALERT_RUN_MAX_WORKERS} workers")
+        with ThreadPoolExecutor(max_workers=ALERT_RUN_MAX_WORKERS, thread_name_prefix='alert-shard') as executor:
+            futures = {
+                executor.submit(run_alert_shard, user_id, alert_ids, tenders, evaluated_at, first_seen): user_id
+                for user_id, alert_ids in alert_ids_by_user.items()
+            }
+            for future in as_completed(futures):
                 try:
-                    # Prepare keywords for fetching tenders
-                    keywords = {
-                        'agency_name': [alert.keyword] if alert.keyword_type == 'agency' else '',
-                        'activity_name': [alert.keyword] if alert.keyword_type == 'activity' else '',
-                        'tender_name': alert.keyword if alert.keyword_type == 'tender' else '',
-                        'keywords': alert.keyword.split(',') if alert.keyword_type == 'keyword' else []
-                    }
-
-                    print(f"[{datetime.now()}] Processing alert ID: {alert.id}")
-                    print(f"[{datetime.now()}] Search Criteria for alert ID {alert.id}: {keywords}")
-
-                    # Fetch and filter tenders based on the alert's keywords
-                    try:
-                        tenders = fetch_tenders()
-                        filtered_tenders = filter_tenders(tenders, keywords)
-                    except Exception as e:
-                        error_message = str(e)
-                        print(f"[{datetime.now()}] Error fetching tenders for alert ID {alert.id}: {error_message}")
-                        
-                        # Log the error but continue with other alerts
-                        continue
-
-                    print(f"[{datetime.now()}] Filtered tenders for alert ID {alert.id}: {len(filtered_tenders)} tenders found.")
-
-                    # Add filtered tenders to the appropriate receivers
-                    if filtered_tenders:
-                        receiver_emails = alert.emails.split(',')
-                        for email in receiver_emails:
-                            tenders_by_receiver[email].extend(filtered_tenders)  # Group tenders by receiver email
-
-                    # Update the last run date for the alert with proper error handling
-                    try:
-                        alert.last_run_date = datetime.utcnow()
-                        db.session.commit()
-                        print(f"[{datetime.now()}] Successfully updated last_run_date for alert ID {alert.id}")
-                    except Exception as commit_error:
-                        print(f"[{datetime.now()}] Error committing alert update for ID {alert.id}: {commit_error}")
-                        # Try to rollback and continue
-                        try:
-                            db.session.rollback()
-                            print(f"[{datetime.now()}] Successfully rolled back session for alert ID {alert.id}")
-                        except Exception as rollback_error:
-                            print(f"[{datetime.now()}] Error rolling back session for alert ID {alert.id}: {rollback_error}")
-                            # If rollback fails, try to refresh the session
-                            try:
-                                db.session.close()
-                                db.session.execute(text('SELECT 1'))
-                                print(f"[{datetime.now()}] Successfully refreshed session after rollback failure")
-                            except Exception as refresh_error:
-                                print(f"[{datetime.now()}] Failed to refresh session after rollback failure: {refresh_error}")
-                                continue
-                        
-                except Exception as alert_error:
-                    print(f"[{datetime.now()}] Unexpected error processing alert ID {alert.id}: {alert_error}")
+                    shard = future.result()
+                except Exception as shard_error:
+                    print(f"[{datetime.now()}] Alert shard for user {futures[future]} crashed: {shard_error}")
+                    alerts_failed += len(alert_ids_by_user[futures[future]])
                     continue
+                
+                matches.update(shard['matches'])
+                alert_updates.extend(shard['alert_updates'])
+                alerts_processed += shard['alerts_processed']
+                alerts_failed += shard['alerts_failed']
+                run['alerts_retried'] += shard['alerts_retried']
+        
+        run['alerts_evaluated'] = alerts_processed
+        run['alerts_failed'] = alerts_failed
+        mark_scheduler_run_phase(run, 'shards')
+        print(f"[{datetime.now()}] Alert shards finished in {run['phases_ms']['shards'] / 1000:.1f}s: {alerts_processed} processed, {alerts_failed} failed")
+        
+        # Group matches by receiver in SQL, then record every alert's outcome in one bulk UPDATE
+        # and one commit. If either fails the alerts stay due and nothing is sent, so the next
+        # dispatch redoes the run cleanly.
+        with app.app_context():
+            try:
+                receivers = group_alert_recipients(list(matches))
+                mark_scheduler_run_phase(run, 'grouping')
+                apply_alert_updates(alert_updates)
+                db.session.commit()
+            except Exception as bookkeeping_error:
+                db.session.rollback()
+                print(f"[{datetime.now()}] Error recording alert outcomes: {bookkeeping_error}")
+                mark_scheduler_run_phase(run, 'bookkeeping')
+                return finish_scheduler_run(run, 'failed', f'Error recording alert outcomes: {bookkeeping_error}')
+        mark_scheduler_run_phase(run, 'bookkeeping')
+        print(f"[{datetime.now()}] Recorded outcomes for {len(alert_updates)} alerts in {run['phases_ms']['bookkeeping']:.0f}ms")
+        
+        # Send one grouped email per receiver
+        for receiver_email, receiver_alert_ids, owner_id in receivers:
+            tenders = [tender for alert_id in receiver_alert_ids for tender in matches[alert_id]]
+            if tenders:
+                try:
+                    print(f"[{datetime.now()}] Preparing email for {receiver_email} with {len(tenders)} tenders.")
+                    # Add to background queue instead of sending immediately
+                    task_id = add_email_to_queue(tenders, {"grouped_alert": "Grouped by Receiver"}, [receiver_email], f"grouped_{receiver_email}",
+                                                 user_id=owner_id)
+                    run['emails_queued'] += 1
+                    print(f"[{datetime.now()}] Grouped email for {receiver_email} added to background queue (task: {task_id})")
+                except Exception as email_error:
+                    print(f"[{datetime.now()}] Error adding email to queue for {receiver_email}: {email_error}")
+                    continue
+        mark_scheduler_run_phase(run, 'enqueue')
 
-            # Send one grouped email per receiver
-            for receiver_email, tenders in tenders_by_receiver.items():
-                if tenders:
-                    try:
-                        print(f"[{datetime.now()}] Preparing email for {receiver_email} with {len(tenders)} tenders.")
-                        # Add to background queue instead of sending immediately
-                        task_id = add_email_to_queue(tenders, {"grouped_alert": "Grouped by Receiver"}, [receiver_email], f"grouped_{receiver_email}")
-                        print(f"[{datetime.now()}] Grouped email for {receiver_email} added to background queue (task: {task_id})")
-                    except Exception as email_error:
-                        print(f"[{datetime.now()}] Error adding email to queue for {receiver_email}: {email_error}")
-                        continue
-
-            print(f"[{datetime.now()}] Finished processing all alerts.")
+        print(f"[{datetime.now()}] Finished processing all alerts.")
+        return finish_scheduler_run(run, 'success')
             
     except Exception as main_error:
         print(f"[{datetime.now()}] Critical error in run_all_alerts: {main_error}")
@@ -921,71 +2677,176 @@ def run_all_alerts():
             traceback.print_exc()
         except:
             pass
+        return finish_scheduler_run(run, 'failed', str(main_error))
 
 
-from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy.exc import IntegrityError
 import pytz
 import logging
+import socket
+import uuid
+import atexit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger()
+
+# Leader election: every instance runs the scheduler, but only the leader executes its jobs.
+# On Postgres the leader holds a session-level advisory lock on a dedicated connection, which
+# the server releases if the process dies. Elsewhere, or behind a transaction-pooling proxy
+# where session locks do not survive, a lease row in scheduler_lease is renewed instead.
+SCHEDULER_LEADER_STRATEGY = os.getenv('SCHEDULER_LEADER_STRATEGY', 'auto')  # auto, advisory or lease
+SCHEDULER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', '90'))
+SCHEDULER_LEADER_CHECK_SECONDS = int(os.getenv('SCHEDULER_LEADER_CHECK_SECONDS', '30'))
+SCHEDULER_LEADER_LOCK_ID = 7415260311  # Advisory lock key reserved for the Signal scheduler
+SCHEDULER_LEASE_NAME = 'scheduler'
+INSTANCE_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+leader_state = {'is_leader': False, 'strategy': None, 'connection': None, 'since': None}
+leader_state_lock = threading.Lock()
+
+def get_leader_strategy():
+    """Resolve the configured leader election strategy for the current database"""
+    if SCHEDULER_LEADER_STRATEGY != 'auto':
+        return SCHEDULER_LEADER_STRATEGY
+    if db.engine.dialect.name != 'postgresql' or uses_transaction_pooler(app.config['SQLALCHEMY_DATABASE_URI']):
+        return 'lease'  # Session advisory locks do not survive a transaction pooler
+    return 'advisory'
+
+def try_acquire_advisory_leadership():
+    """Hold pg_try_advisory_lock on a dedicated connection for as long as this process is leader"""
+    connection = leader_state['connection']
+    if connection is not None:
+        try:
+            connection.execute(text('SELECT 1'))
+            connection.commit()
+            return True
+        except Exception as e:
+            print(f"[{datetime.now()}] Scheduler leader connection lost: {e}")
+            try:
+                connection.invalidate()
+                connection.close()
+            except Exception:
+                pass
+            leader_state['connection'] = None
+    
+    connection = db.engine.connect()
+    try:
+        acquired = connection.execute(text('SELECT pg_try_advisory_lock(:lock_id)'), {'lock_id': SCHEDULER_LEADER_LOCK_ID}).scalar()
+        connection.commit()
+    except Exception:
+        connection.close()
+        raise
+    
+    if acquired:
+        leader_state['connection'] = connection
+        return True
+    connection.close()
+    return False
+
+def try_acquire_lease_leadership():
+    """Take or renew the scheduler lease row if it is ours or has expired"""
+    now = datetime.utcnow()
+    params = {
+        'name': SCHEDULER_LEASE_NAME,
+        'holder': INSTANCE_ID,
+        'now': now,
+        'expires_at': now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)
+    }
+    result = db.session.execute(text("""
+        UPDATE scheduler_lease SET holder = :holder, expires_at = :expires_at, updated_at = :now
+        WHERE name = :name AND (holder = :holder OR expires_at < :now)
+    """), params)
+    if result.rowcount:
+        db.session.commit()
+        return True
+    
+    if db.session.get(SchedulerLease, SCHEDULER_LEASE_NAME) is not None:
+        db.session.commit()
+        return False
+    
+    try:
+        db.session.add(SchedulerLease(name=SCHEDULER_LEASE_NAME, holder=INSTANCE_ID, expires_at=params['expires_at'], updated_at=now))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # Another instance created the lease first
+        db.session.rollback()
+        return False
+
+def ensure_scheduler_leadership():
+    """Acquire or renew scheduler leadership and return whether this instance is the leader"""
+    with leader_state_lock:
+        try:
+            with app.app_context():
+                strategy = get_leader_strategy()
+                if strategy == 'advisory':
+                    is_leader = try_acquire_advisory_leadership()
+                else:
+                    is_leader = try_acquire_lease_leadership()
+        except Exception as e:
+            print(f"[{datetime.now()}] Scheduler leader election failed: {e}")
+            strategy, is_leader = leader_state['strategy'], False
+        
+        if is_leader and not leader_state['is_leader']:
+            leader_state['since'] = datetime.now()
+            logger.info(f"Instance {INSTANCE_ID} became scheduler leader ({strategy})")
+        elif not is_leader and leader_state['is_leader']:
+            leader_state['since'] = None
+            logger.warning(f"Instance {INSTANCE_ID} lost scheduler leadership ({strategy})")
+        leader_state['is_leader'] = is_leader
+        leader_state['strategy'] = strategy
+        return is_leader
+
+def release_scheduler_leadership():
+    """Give up leadership on shutdown so another instance can take over immediately"""
+    with leader_state_lock:
+        if not leader_state['is_leader']:
+            return
+        try:
+            if leader_state['connection'] is not None:
+                leader_state['connection'].execute(text('SELECT pg_advisory_unlock(:lock_id)'), {'lock_id': SCHEDULER_LEADER_LOCK_ID})
+                leader_state['connection'].commit()
+                leader_state['connection'].close()
+                leader_state['connection'] = None
+            else:
+                with app.app_context():
+                    db.session.execute(text("DELETE FROM scheduler_lease WHERE name = :name AND holder = :holder"),
+                                       {'name': SCHEDULER_LEASE_NAME, 'holder': INSTANCE_ID})
+                    db.session.commit()
+            logger.info(f"Instance {INSTANCE_ID} released scheduler leadership")
+        except Exception as e:
+            logger.error(f"Failed to release scheduler leadership: {e}")
+        leader_state['is_leader'] = False
+
+atexit.register(release_scheduler_leadership)
+
 def start_scheduler():
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
     logger.info("Scheduler starting...")
     scheduler = BackgroundScheduler()
     timezone = pytz.timezone('Asia/Riyadh')
     
-    # Track job status and retry attempts
-    job_status = {
-        'last_success': None,
-        'last_failure': None,
-        'retry_count': 0,
-        'max_retries': 3,
-        'next_run': None,
-        'is_retry_mode': False
-    }
-    
-    def schedule_retry():
-        """Schedule a retry after 30 minutes"""
-        if job_status['retry_count'] < job_status['max_retries']:
-            retry_time = datetime.now() + timedelta(minutes=30)
-            job_status['retry_count'] += 1
-            job_status['is_retry_mode'] = True
-            job_status['next_run'] = retry_time
-            
-            logger.info(f"Job failed. Scheduling retry {job_status['retry_count']}/{job_status['max_retries']} for: {retry_time}")
-            
-            # Add retry job
-            scheduler.add_job(
-                func=debug_job,
-                trigger='date',
-                run_date=retry_time,
-                id='retry_job',
-                timezone=timezone
-            )
-        else:
-            # Max retries reached, reset and wait for next scheduled run
-            job_status['retry_count'] = 0
-            job_status['is_retry_mode'] = False
-            logger.warning(f"Max retries reached. Returning to normal schedule.")
+    # Track job status (shared with the scheduler status routes). Failed alerts are retried
+    # individually by the dispatcher, so there is no whole-job retry here.
+    job_status = scheduler_job_status
 
     def debug_job():
-        """Scheduler job with error handling and retry logic"""
+        """Scheduler job with error handling and database recovery"""
+        if not ensure_scheduler_leadership():
+            logger.info(f"Instance {INSTANCE_ID} is not the scheduler leader, skipping run_all_alerts")
+            return
+        
         try:
             logger.info("Scheduler triggered run_all_alerts")
-            run_all_alerts()
+            run = run_all_alerts(trigger='scheduled', due_only=True)
+            if run['status'] == 'failed':
+                raise RuntimeError(run['error'])
             logger.info("Scheduler job completed successfully")
-            
-            # Reset retry count on success
-            job_status['retry_count'] = 0
-            job_status['is_retry_mode'] = False
             job_status['last_success'] = datetime.now()
-            
-            # If this was a retry job, remove it
-            try:
-                scheduler.remove_job('retry_job')
-            except:
-                pass
                 
         except Exception as job_error:
             logger.error(f"Scheduler job failed: {job_error}")
@@ -1003,21 +2864,13 @@ def start_scheduler():
                             db.session.execute(text('SELECT 1'))
                             logger.info("Database connection recovered successfully")
                             
-                            # Retry the job once immediately
+                            # Retry once immediately; only alerts that are still due run again
                             logger.info("Retrying scheduler job immediately...")
-                            run_all_alerts()
+                            run = run_all_alerts(trigger='recovery', due_only=True)
+                            if run['status'] == 'failed':
+                                raise RuntimeError(run['error'])
                             logger.info("Scheduler job retry completed successfully")
-                            
-                            # Reset retry count on success
-                            job_status['retry_count'] = 0
-                            job_status['is_retry_mode'] = False
-                            
-                            # If this was a retry job, remove it
-                            try:
-                                scheduler.remove_job('retry_job')
-                            except:
-                                pass
-                                
+                            job_status['last_success'] = datetime.now()
                             return
                             
                         except Exception as recovery_error:
@@ -1035,25 +2888,26 @@ def start_scheduler():
                 logger.error(f"Full traceback: {traceback.format_exc()}")
             except:
                 pass
-            
-            # Schedule retry if not already in retry mode
-            if not job_status['is_retry_mode']:
-                schedule_retry()
 
     def database_health_check_job():
         """Periodic database health check job"""
+        if not ensure_scheduler_leadership():
+            logger.info(f"Instance {INSTANCE_ID} is not the scheduler leader, skipping database health check")
+            return
+        
         try:
             with app.app_context():
                 is_healthy, message = check_database_health()
                 if is_healthy:
                     logger.info("Database health check passed")
+                    purge_finished_tasks()
                 else:
                     logger.warning(f"Database health check failed: {message}")
         except Exception as health_error:
             logger.error(f"Database health check job failed: {health_error}")
 
-    # Add the main scheduled job (daily at 11:51 AM)
-    main_trigger = CronTrigger(hour=12, minute=33, timezone=timezone)
+    # Add the main alert dispatcher, which evaluates whichever alerts are due on their own schedules
+    main_trigger = IntervalTrigger(minutes=ALERT_DISPATCH_INTERVAL_MINUTES, timezone=timezone)
     scheduler.add_job(
         func=debug_job,
         trigger=main_trigger,
@@ -1064,15 +2918,32 @@ def start_scheduler():
     health_trigger = CronTrigger(minute='*/30', timezone=timezone)
     scheduler.add_job(func=database_health_check_job, trigger=health_trigger, id='health_check_job')
     
+    # Move tenders out of the hot window and compact/expire old archive months once a day
+    def tender_archive_job():
+        if not ensure_scheduler_leadership():
+            logger.info(f"Instance {INSTANCE_ID} is not the scheduler leader, skipping tender archive maintenance")
+            return
+        try:
+            maintain_tender_archive()
+        except Exception as archive_error:
+            logger.error(f"Tender archive maintenance failed: {archive_error}")
+    
+    scheduler.add_job(func=tender_archive_job, trigger=CronTrigger(hour=3, minute=15, timezone=timezone), id='tender_archive_job')
+    
+    # Keep renewing (or trying to take over) scheduler leadership
+    scheduler.add_job(func=ensure_scheduler_leadership, trigger='interval', seconds=SCHEDULER_LEADER_CHECK_SECONDS, id='leader_election_job')
+    ensure_scheduler_leadership()
+    
     scheduler.start()
     logger.info("Scheduler started successfully.")
-    logger.info(f"Main alert job scheduled for daily at 11:51 AM {timezone}")
+    logger.info(f"Main alert job scheduled: {main_trigger}, next run {scheduler.get_job('main_alert_job').next_run_time}")
     logger.info(f"Database health check scheduled every 30 minutes")
+    logger.info(f"Instance {INSTANCE_ID} scheduler leader: {leader_state['is_leader']} ({leader_state['strategy']})")
 
 
 def log_and_run_alerts():
     logger.info(f"run_all_alerts triggered at {datetime.now()}")
-    run_all_alerts()    
+    return run_all_alerts()    
 # Routes
 @app.route('/')
 def index():
@@ -1121,25 +2992,334 @@ def logout():
     flash('You have been logged out.', 'success')
     return redirect(url_for('login'))
 
+# Agency and activity vocabulary from keywords.json, parsed once and reloaded only when the
+# file's mtime changes. The dashboard and the tender browser search it through /typeahead.
+KEYWORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'keywords.json')
+
+keyword_vocabulary = {'mtime': None, 'data': None, 'fingerprint': None}
+keyword_vocabulary_lock = threading.Lock()
+
+def get_keyword_vocabulary():
+    """Return the cached vocabulary dict (data and a content fingerprint), reloading it if
+    keywords.json changed on disk"""
+    mtime = os.stat(KEYWORDS_PATH).st_mtime_ns
+    if keyword_vocabulary['mtime'] == mtime:
+        return keyword_vocabulary
+    
+    with keyword_vocabulary_lock:
+        if keyword_vocabulary['mtime'] != mtime:
+            with open(KEYWORDS_PATH, 'rb') as file:
+                raw = file.read()
+            data = json.loads(raw)
+            keyword_vocabulary.update(
+                data=data,
+                fingerprint=hashlib.sha256(raw).hexdigest()[:12],
+                mtime=mtime
+            )
+            print(f"[{datetime.now()}] Loaded keywords.json ({len(data.get('agency_names', []))} agencies, {len(data.get('activity_names', []))} activities, version {keyword_vocabulary['fingerprint']})")
+    return keyword_vocabulary
+
+# Typeahead over agency and activity names: a prefix trie keyed on normalised words, built from
+# keywords.json plus the names seen in the current tender snapshot (with their tender counts).
+# The index is rebuilt only when the vocabulary or the snapshot changes.
+TYPEAHEAD_MAX_RESULTS = 20
+TYPEAHEAD_NODE_CANDIDATES = 50  # Best-ranked names kept per trie node
+ARABIC_DIACRITICS = {code: None for code in list(range(0x064B, 0x0653)) + [0x0640, 0x0670]}  # Tashkeel, tatweel, superscript alef
+ARABIC_LETTER_VARIANTS = str.maketrans({'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ة': 'ه', 'ى': 'ي', 'ؤ': 'و', 'ئ': 'ي'})
+
+def normalize_search_text(value):
+    """Fold case, Arabic diacritics and letter variants so typed queries match stored names"""
+    value = (value or '').translate(ARABIC_DIACRITICS).translate(ARABIC_LETTER_VARIANTS).casefold()
+    return ' '.join(value.split())
+
+class NameTrie:
+    """Prefix trie where every word of a name is an entry point, so "الصحة" finds "وزارة الصحة".
+    Each node keeps its best TYPEAHEAD_NODE_CANDIDATES entries, so a lookup is one walk down
+    the query's characters with no subtree traversal."""
+    def __init__(self, entries):
+        # entries: dicts with name, kind, tender_count and source
+        self.entries = entries
+        self.root = {}
+        for index, entry in enumerate(entries):
+            words = normalize_search_text(entry['name']).split(' ')
+            for position in range(len(words)):
+                node = self.root
+                for char in ' '.join(words[position:]):
+                    node = node.setdefault(char, {})
+                    node.setdefault(None, []).append(index)
+        self.prune(self.root)
+        self.top_entries = sorted(range(len(entries)), key=self.rank_key)[:TYPEAHEAD_NODE_CANDIDATES]
+
+    def rank_key(self, index):
+        entry = self.entries[index]
+        return (-entry['tender_count'], entry['name'])
+
+    def prune(self, node):
+        for key, child in node.items():
+            if key is None:
+                unique = sorted(set(child), key=self.rank_key)
+                node[None] = unique[:TYPEAHEAD_NODE_CANDIDATES]
+            else:
+                self.prune(child)
+
+    def search(self, query, limit=10):
+        """Ranked entries whose name has a word sequence starting with query"""
+        normalized = normalize_search_text(query)
+        if not normalized:
+            candidates = self.top_entries
+        else:
+            node = self.root
+            for char in normalized:
+                node = node.get(char)
+                if node is None:
+                    return []
+            candidates = node.get(None, [])
+        
+        matches = [self.entries[index] for index in candidates]
+        matches.sort(key=lambda entry: typeahead_rank(entry, normalized))
+        return matches[:limit]
+
+def typeahead_rank(entry, normalized_query):
+    """Names that start with the query rank above names that only contain it as a later word,
+    then by tender count"""
+    return (not normalize_search_text(entry['name']).startswith(normalized_query), -entry['tender_count'], entry['name'])
+
+typeahead_index = {'key': None, 'tries': None}
+typeahead_index_lock = threading.Lock()
+
+def build_typeahead_entries(vocabulary, tenders):
+    """Merge keywords.json names with names from tenders, counting tenders per normalised name"""
+    counts = {'agency': defaultdict(int), 'activity': defaultdict(int)}
+    tender_names = {'agency': {}, 'activity': {}}  # Normalised name -> name as Etimad spells it
+    for tender in tenders or []:
+        for kind, field in (('agency', 'agencyName'), ('activity', 'tenderActivityName')):
+            if tender.get(field):
+                normalized = normalize_search_text(tender[field])
+                counts[kind][normalized] += 1
+                tender_names[kind].setdefault(normalized, tender[field].strip())
+    
+    entries = []
+    for kind, vocabulary_key in (('agency', 'agency_names'), ('activity', 'activity_names')):
+        known = set()
+        for name in vocabulary.get(vocabulary_key, []):
+            normalized = normalize_search_text(name)
+            if normalized in known:
+                continue
+            known.add(normalized)
+            entries.append({'name': name, 'kind': kind, 'tender_count': counts[kind].get(normalized, 0), 'source': 'keywords'})
+        # Names from live tenders that the static list is missing
+        for normalized, name in tender_names[kind].items():
+            if normalized not in known:
+                entries.append({'name': name, 'kind': kind, 'tender_count': counts[kind][normalized], 'source': 'tenders'})
+    return entries
+
+def get_typeahead_tries():
+    """Current tries per kind, rebuilt when keywords.json or the tender snapshot changed"""
+    vocabulary = get_keyword_vocabulary()
+    if tender_snapshot['tenders'] is None:
+        load_tender_snapshot_from_disk()
+    key = (vocabulary['fingerprint'], tender_snapshot['fetched_at'])
+    if typeahead_index['key'] == key:
+        return typeahead_index['tries']
+    
+    with typeahead_index_lock:
+        if typeahead_index['key'] != key:
+            started = time_module.perf_counter()
+            entries = build_typeahead_entries(vocabulary['data'], tender_snapshot['tenders'])
+            typeahead_index['tries'] = {
+                kind: NameTrie([entry for entry in entries if entry['kind'] == kind])
+                for kind in ('agency', 'activity')
+            }
+            typeahead_index['key'] = key
+            print(f"[{datetime.now()}] Built typeahead index over {len(entries)} names in {(time_module.perf_counter() - started) * 1000:.0f}ms")
+    return typeahead_index['tries']
+
+@app.route('/typeahead', methods=['GET'])
+@login_required
+def typeahead():
+    """Ranked agency/activity name matches for a query prefix"""
+    started = time_module.perf_counter()
+    kind = request.args.get('kind')
+    if kind not in (None, 'agency', 'activity'):
+        return jsonify({'error': "kind must be 'agency' or 'activity'"}), 400
+    limit = max(1, min(request.args.get('limit', 10, type=int), TYPEAHEAD_MAX_RESULTS))
+    
+    query = request.args.get('q', '')
+    tries = get_typeahead_tries()
+    if kind:
+        results = tries[kind].search(query, limit=limit)
+    else:
+        normalized = normalize_search_text(query)
+        results = sorted(tries['agency'].search(query, limit=limit) + tries['activity'].search(query, limit=limit),
+                         key=lambda entry: typeahead_rank(entry, normalized))[:limit]
+    return jsonify({
+        'results': results,
+        'took_ms': round((time_module.perf_counter() - started) * 1000, 2)
+    })
+
+# Dashboard alert listing: keyset pagination over a whitelisted sort column plus alert.id, so
+# every page is an index range scan of DASHBOARD_PAGE_SIZE rows however many alerts exist.
+DASHBOARD_PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', '50'))
+DASHBOARD_MAX_PAGE_SIZE = 200
+DASHBOARD_SORT_COLUMNS = {
+    'created_at': Alert.created_at,
+    'keyword': Alert.keyword,
+    'keyword_type': db.func.coalesce(Alert.keyword_type, ''),
+}
+
+def encode_keyset_cursor(value, row_id):
+    """Opaque cursor holding the sort value and id of a boundary row"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode('utf-8')).decode('ascii')
+
+def decode_keyset_cursor(cursor, is_datetime=False):
+    """Inverse of encode_keyset_cursor; raises ValueError for a malformed cursor"""
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if is_datetime:
+            value = datetime.fromisoformat(value)
+        return value, row_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+def paginate_keyset(query, sort_column, id_column, encode_cursor, decode_cursor, order='asc', after=None, before=None, page_size=DASHBOARD_PAGE_SIZE):
+    """Return (rows, next_cursor, prev_cursor) for one page of `query` ordered by (sort_column, id_column).
+    Cursors come from encode_cursor(row) and are read back with decode_cursor(cursor)."""
+    key = db.tuple_(sort_column, id_column)
+    descending = order == 'desc'
+    
+    # Paging backwards walks the index in the opposite direction, then flips the rows
+    backwards = before is not None and after is None
+    if after is not None:
+        boundary = db.tuple_(*decode_cursor(after))
+        query = query.filter(key < boundary if descending else key > boundary)
+    elif before is not None:
+        boundary = db.tuple_(*decode_cursor(before))
+        query = query.filter(key > boundary if descending else key < boundary)
+    
+    ascending_scan = descending == backwards
+    query = query.order_by(*(
+        [sort_column.asc(), id_column.asc()] if ascending_scan else [sort_column.desc(), id_column.desc()]
+    ))
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+    
+    if not rows:
+        return rows, None, None
+    has_next = has_more if not backwards else True
+    has_prev = has_more if backwards else after is not None
+    return (
+        rows,
+        encode_cursor(rows[-1]) if has_next else None,
+        encode_cursor(rows[0]) if has_prev else None
+    )
+
+def encode_alert_cursor(sort, alert):
+    return encode_keyset_cursor(getattr(alert, sort) or '', alert.id)
+
+def decode_alert_cursor(sort, cursor):
+    value, alert_id = decode_keyset_cursor(cursor, is_datetime=sort == 'created_at')
+    return value, int(alert_id)
+
+def paginate_alerts(query, sort='created_at', order='asc', after=None, before=None, page_size=DASHBOARD_PAGE_SIZE):
+    """Return (alerts, next_cursor, prev_cursor) for one keyset page of an Alert query"""
+    return paginate_keyset(query, DASHBOARD_SORT_COLUMNS[sort], Alert.id,
+                           lambda alert: encode_alert_cursor(sort, alert),
+                           lambda cursor: decode_alert_cursor(sort, cursor),
+                           order, after, before, page_size)
+
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Load the keywords
-    with open('keywords.json', 'r', encoding='utf-8') as file:
-        keywords = json.load(file)
+    # Only the vocabulary counts are rendered; the selects load options from /typeahead
+    vocabulary = get_keyword_vocabulary()
+    activity_count = len(vocabulary['data'].get('activity_names', []))
+    agency_count = len(vocabulary['data'].get('agency_names', []))
+
+    # Sorting, filtering and paging come from the query string
+    sort = request.args.get('sort', 'created_at')
+    if sort not in DASHBOARD_SORT_COLUMNS:
+        sort = 'created_at'
+    order = 'desc' if request.args.get('order') == 'desc' else 'asc'
+    page_size = max(1, min(request.args.get('page_size', DASHBOARD_PAGE_SIZE, type=int), DASHBOARD_MAX_PAGE_SIZE))
+    filters = {
+        'q': request.args.get('q', '').strip(),
+        'keyword_type': request.args.get('keyword_type', '').strip(),
+        'user': request.args.get('user', '').strip() if current_user.role == 'admin' else ''
+    }
 
-    # Extract the agencies and activities
-    activities = keywords.get('activity_names', [])
-    agencies = keywords.get('agency_names', [])
+    # Fetch alerts for the user (admin or regular user), with owners and recipients loaded eagerly
+    alerts_query = Alert.query
+    if current_user.role != 'admin':
+        alerts_query = alerts_query.filter(Alert.user_id == current_user.id)
+    if filters['q']:
+        alerts_query = alerts_query.filter(Alert.keyword.ilike(f"%{filters['q']}%"))
+    if filters['keyword_type']:
+        alerts_query = alerts_query.filter(Alert.keyword_type == filters['keyword_type'])
+    if filters['user']:
+        alerts_query = alerts_query.filter(Alert.user_id.in_(
+            db.select(User.id).where(User.username.ilike(f"%{filters['user']}%"))
+        ))
+    total_alerts = alerts_query.order_by(None).count()
 
-    # Fetch alerts for the user (admin or regular user)
-    if current_user.role == 'admin':
-        user_alerts = Alert.query.order_by(Alert.created_at.asc()).all()  # Sort by created_at
-    else:
-        user_alerts = Alert.query.filter_by(user_id=current_user.id).order_by(Alert.created_at.asc()).all()
+    try:
+        user_alerts, next_cursor, prev_cursor = paginate_alerts(
+            alerts_query.options(db.joinedload(Alert.user), db.selectinload(Alert.recipients)),
+            sort, order, request.args.get('after'), request.args.get('before'), page_size
+        )
+    except ValueError:
+        flash("That page link is no longer valid, showing the first page.", "warning")
+        user_alerts, next_cursor, prev_cursor = paginate_alerts(
+            alerts_query.options(db.joinedload(Alert.user), db.selectinload(Alert.recipients)),
+            sort, order, page_size=page_size
+        )
 
     # Pass data to the template
-    return render_template('dashboard.html', activities=activities, agencies=agencies, alerts=user_alerts)
+    return render_template('dashboard.html', activity_count=activity_count,
+                           agency_count=agency_count, alerts=user_alerts,
+                           total_alerts=total_alerts, next_cursor=next_cursor, prev_cursor=prev_cursor,
+                           sort=sort, order=order, page_size=page_size, filters=filters)
+
+ALERT_DUPLICATE_LABELS = {
+    'activity': "activity '{keyword}'",
+    'agency': "agency '{keyword}'",
+    'tender': "tender '{keyword}'",
+    'keyword': "keywords"
+}
+
+def find_existing_alerts(user_id, criteria, receiver_emails):
+    """Find the user's alerts that match any (keyword_type, keyword) pair and share a receiver.
+    One query regardless of how many pairs are checked; recipients come in one more."""
+    if not criteria:
+        return []
+    return Alert.query.options(db.selectinload(Alert.recipients)) \
+        .filter(
+            Alert.user_id == user_id,
+            db.tuple_(Alert.keyword_type, Alert.keyword).in_(criteria),
+            Alert.id.in_(db.select(AlertRecipient.alert_id).where(AlertRecipient.email.in_(receiver_emails)))
+        ).order_by(Alert.id).all()
+
+def create_alerts(user_id, criteria, receiver_emails, schedule, next_run_at):
+    """Insert one alert per (keyword_type, keyword) pair with its recipients using two
+    executemany INSERTs, instead of one INSERT per alert and recipient. Returns the new ids."""
+    now = datetime.utcnow()
+    alert_ids = db.session.scalars(
+        insert(Alert).returning(Alert.id),  # Every alert gets the same recipients, so row order does not matter
+        [
+            {'keyword': keyword, 'keyword_type': keyword_type, 'user_id': user_id, 'created_at': now,
+             'schedule': schedule, 'next_run_at': next_run_at, 'run_attempts': 0}
+            for keyword_type, keyword in criteria
+        ]
+    ).all()
+    recipients = normalize_recipient_emails(receiver_emails)
+    db.session.execute(insert(AlertRecipient), [
+        {'alert_id': alert_id, 'email': email} for alert_id in alert_ids for email in recipients
+    ])
+    return alert_ids
 
 @app.route('/get_tenders', methods=['POST'])
 def get_tenders():
@@ -1153,80 +3333,39 @@ def get_tenders():
     receiver_emails = sorted([email.strip() for email in request.form.get('emails').split(',')])  # Sort emails for consistency
     search_keywords = request.form.get('search_keywords', '').split(',')
     tender_name = request.form.get('tender_name', '')
+    schedule = request.form.get('schedule', '').strip() or None
 
     if not selected_activities and not selected_agencies and not search_keywords and not tender_name:
         flash("Please select at least one search criteria.", "danger")
         return redirect(url_for('dashboard'))
 
-    # Function to check for any existing alert for the same keyword (agency, activity, or tender) and receiver emails
-    def check_existing_alerts(keyword, keyword_type):
-        existing_alerts = Alert.query.filter_by(keyword=keyword, keyword_type=keyword_type, user_id=user.id).all()
-        for alert in existing_alerts:
-            alert_emails = set(alert.emails.split(','))
-            if any(email in alert_emails for email in receiver_emails):  # If any email matches
-                return alert
-        return None
-
-    # Keep track if any alert exists to avoid sending emails or creating alerts
-    existing_alert_found = False
-
-    # Handle alerts for selected activities (same as agency handling)
-    for activity in selected_activities:
-        existing_alert = check_existing_alerts(activity, "activity")
-        if existing_alert:
-            flash(f"Alert already exists for activity '{activity}' with one of the receiver emails: {existing_alert.emails}", "danger")
-            existing_alert_found = True  # Mark that an existing alert was found, so we won't create a new one
-
-    # Handle alerts for selected agencies
-    for agency in selected_agencies:
-        existing_alert = check_existing_alerts(agency, "agency")
-        if existing_alert:
-            flash(f"Alert already exists for agency '{agency}' with one of the receiver emails: {existing_alert.emails}", "danger")
-            existing_alert_found = True  # Mark that an existing alert was found, so we won't create a new one
+    try:
+        parse_alert_schedule(schedule)
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for('dashboard'))
+    next_run_at = compute_next_alert_run(schedule)
 
-    # Handle tender_name or keyword if provided
+    # Every (keyword_type, keyword) pair this request would create an alert for
+    criteria = [("activity", activity) for activity in selected_activities]
+    criteria += [("agency", agency) for agency in selected_agencies]
     if tender_name:
-        existing_alert = check_existing_alerts(tender_name, "tender")
-        if existing_alert:
-            flash(f"Alert already exists for tender '{tender_name}' with one of the receiver emails: {existing_alert.emails}", "danger")
-            existing_alert_found = True  # Mark that an existing alert was found
-
-    elif search_keywords != ['']:
-        keyword_str = ', '.join(search_keywords)
-        existing_alert = check_existing_alerts(keyword_str, "keyword")
-        if existing_alert:
-            flash(f"Alert already exists for keywords with one of the receiver emails: {existing_alert.emails}", "danger")
-            existing_alert_found = True  # Mark that an existing alert was found
+        criteria.append(("tender", tender_name))
+    if search_keywords != ['']:
+        criteria.append(("keyword", ', '.join(search_keywords)))
+
+    # Check for any existing alert for the same keyword and receiver emails in a single query
+    existing_alerts = find_existing_alerts(user.id, criteria, receiver_emails)
+    for existing_alert in existing_alerts:
+        label = ALERT_DUPLICATE_LABELS[existing_alert.keyword_type].format(keyword=existing_alert.keyword)
+        flash(f"Alert already exists for {label} with one of the receiver emails: {existing_alert.emails}", "danger")
 
     # If any existing alert was found, stop further processing
-    if existing_alert_found:
+    if existing_alerts:
         return redirect(url_for('dashboard'))
 
     # If no existing alert was found, create new alerts
-    alerts_created = []
-    if selected_activities:
-        for activity in selected_activities:
-            new_alert = Alert(keyword=activity, keyword_type="activity", emails=','.join(receiver_emails), user_id=user.id)
-            db.session.add(new_alert)
-            alerts_created.append(new_alert)
-
-    if selected_agencies:
-        for agency in selected_agencies:
-            new_alert = Alert(keyword=agency, keyword_type="agency", emails=','.join(receiver_emails), user_id=user.id)
-            db.session.add(new_alert)
-            alerts_created.append(new_alert)
-
-    if tender_name:
-        new_alert = Alert(keyword=tender_name, keyword_type="tender", emails=','.join(receiver_emails), user_id=user.id)
-        db.session.add(new_alert)
-        alerts_created.append(new_alert)
-
-    if search_keywords != ['']:
-        keyword_str = ', '.join(search_keywords)
-        new_alert = Alert(keyword=keyword_str, keyword_type="keyword", emails=','.join(receiver_emails), user_id=user.id)
-        db.session.add(new_alert)
-        alerts_created.append(new_alert)
-
+    alerts_created = create_alerts(user.id, criteria, receiver_emails, schedule, next_run_at) if criteria else []
     db.session.commit()
 
     if alerts_created:
@@ -1241,7 +3380,7 @@ def get_tenders():
         }
         
         # Create a background task for processing this alert
-        task_id = add_alert_to_background_queue(keywords, receiver_emails, f"alert_creation_{int(time_module.time())}")
+        task_id = add_alert_to_background_queue(keywords, receiver_emails, f"alert_creation_{int(time_module.time())}", user_id=user.id)
         
         flash(f"✅ Alert(s) created successfully! Processing has been started in the background (Task: {task_id}). You can close this page - you'll receive an email when processing is complete.", 'success')
 
@@ -1276,7 +3415,7 @@ def fetch_tenders_manual():
     }
     
     # Add to background queue for immediate processing
-    task_id = add_alert_to_background_queue(keywords, receiver_emails, f"manual_fetch_{int(time_module.time())}")
+    task_id = add_alert_to_background_queue(keywords, receiver_emails, f"manual_fetch_{int(time_module.time())}", user_id=user.id)
     
     flash(f"✅ Tender fetching started in the background (Task: {task_id}). You can close this page - you'll receive an email when processing is complete.", 'success')
     
@@ -1314,11 +3453,15 @@ def email_queue_status():
     if not current_user.is_authenticated or current_user.role != 'admin':
         return jsonify({"error": "Unauthorized"}), 403
     
-    queue_size = email_queue.qsize()
+    queue_size = get_queue_depth(EMAIL_LANE)
     is_processing = email_processing_active
     
     return jsonify({
         "queue_size": queue_size,
+        "alert_queue_size": get_queue_depth(ALERT_PROCESSING_LANE),
+        "alert_workers": ALERT_PROCESSING_WORKERS,
+        "email_workers": EMAIL_DELIVERY_WORKERS,
+        "send_rate_per_second": EMAIL_SEND_RATE,
         "is_processing": is_processing,
         "timestamp": datetime.now().isoformat()
     })
@@ -1326,23 +3469,24 @@ def email_queue_status():
 @app.route('/background_task_status', methods=['GET'])
 @login_required
 def background_task_status():
-    """Get the current status of background tasks for the current user"""
+    """Get the lifecycle and phase timings of the current user's background tasks"""
     if not current_user.is_authenticated:
         return jsonify({"error": "Unauthorized"}), 403
     
-    # Get user's alerts that are being processed
-    user_alerts = Alert.query.filter_by(user_id=current_user.id).all()
+    limit = min(request.args.get('limit', 20, type=int), 100)
     
-    # Check if any of these alerts are in the queue
-    queue_size = email_queue.qsize()
+    # Most recent tasks first, including finished ones so slow phases are visible
+    user_tasks = BackgroundTask.query.filter_by(user_id=current_user.id) \
+        .order_by(BackgroundTask.created_at.desc(), BackgroundTask.id.desc()) \
+        .limit(limit).all()
     
-    # For now, we'll show a simple status
-    # In a production system, you might want to track individual task status
     return jsonify({
         "user_id": current_user.id,
-        "total_alerts": len(user_alerts),
-        "queue_size": queue_size,
+        "total_alerts": Alert.query.filter_by(user_id=current_user.id).count(),
+        "queue_size": get_queue_depth(),
+        "user_queue_size": sum(1 for task in user_tasks if task.status in ('pending', 'running')),
         "is_processing": email_processing_active,
+        "tasks": [serialize_task(task) for task in user_tasks],
         "message": "Your tasks are being processed in the background",
         "timestamp": datetime.now().isoformat()
     })
@@ -1385,7 +3529,8 @@ def test_background_email():
         test_search_criteria = {'test': 'Background Email Test'}
         test_emails = [current_user.email]
         
-        task_id = add_email_to_queue(test_tenders, test_search_criteria, test_emails, 'test_background')
+        task_id = add_email_to_queue(test_tenders, test_search_criteria, test_emails, 'test_background',
+                                     user_id=current_user.id, priority=TASK_PRIORITY_INTERACTIVE)
         
         flash(f'Test email task added to background queue (Task: {task_id}). Check your email shortly.', 'success')
         
@@ -1572,220 +3717,136 @@ def delete_user(user_id):
 
 
 def log_memory_usage(message):
+    import psutil
     process = psutil.Process(os.getpid())
     memory_info = process.memory_info()
     print(f"Memory usage for {message}: {memory_info.rss / (1024 * 1024):.2f} MB")  # RSS in MB
 
-def fetch_tenders_single_page(page_number):
-    """Fetch tenders from a single page of the API"""
+# Tender browser (/api_data): reads the local tender store filled by crawls instead of calling
+# Etimad per view. Filters run in SQL and pages are keyset ranges over (sort column, tender_id).
+TENDER_BROWSER_PAGE_SIZE = int(os.getenv('TENDER_BROWSER_PAGE_SIZE', '24'))
+TENDER_BROWSER_MAX_PAGE_SIZE = 200
+TENDER_BROWSER_SORT_COLUMNS = {
+    'submission_date': Tender.submission_date,
+    'name': db.func.coalesce(Tender.name, ''),
+    'agency_name': db.func.coalesce(Tender.agency_name, ''),
+}
+
+def parse_filter_date(value, field):
+    """Parse a YYYY-MM-DD filter value; flashes and returns None when it is malformed"""
+    if not value:
+        return None
     try:
-        base_url = 'https://tenders.etimad.sa/Tender/AllSupplierTendersForVisitorAsync'
-        
-        # Create a session to maintain cookies
-        session = requests.Session()
-        
-        # First, establish a session by accessing the main page
-        print(f"[{datetime.now()}] Establishing session with Etimad for page {page_number}...")
-        main_page_response = session.get(
-            "https://tenders.etimad.sa/Tender/AllTendersForVisitor?PageNumber=1",
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br, zstd',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            },
-            timeout=60
-        )
-        
-        if main_page_response.status_code == 200:
-            print(f"[{datetime.now()}] Session established successfully for page {page_number}. Cookies: {len(session.cookies)}")
-            
-            # Add longer delay after establishing session to avoid bot detection
-            print(f"[{datetime.now()}] ⏳ Waiting 10 seconds after establishing session...")
-            time.sleep(10)
-            
-            # Fetch the specific page
-            print(f"[{datetime.now()}] Fetching page {page_number} from {base_url}")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36',
-                'Accept': 'application/json, text/javascript, */*; q=0.01',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br, zstd',
-                'X-Requested-With': 'XMLHttpRequest',
-                'Host': 'tenders.etimad.sa',
-                'Referer': 'https://tenders.etimad.sa/Tender/AllTendersForVisitor?PageNumber=1'
-            }
-            
-            # Try different PublishDateId values to get different date ranges
-            # PublishDateId=1: Today, PublishDateId=2: Yesterday, PublishDateId=3: 2 days ago, etc.
-            publish_date_id = 1  # Start with today
-            
-            # Calculate which date range this page should show
-            if page_number <= 10:  # First 10 pages show today
-                publish_date_id = 1
-            elif page_number <= 20:  # Next 10 pages show yesterday
-                publish_date_id = 2
-            elif page_number <= 30:  # Next 10 pages show 2 days ago
-                publish_date_id = 3
-            else:  # Beyond that, calculate based on page number
-                publish_date_id = min((page_number - 1) // 10 + 1, 10)
-            
-            response = session.get(f'{base_url}?PublishDateId={publish_date_id}&PageSize=24&PageNumber={page_number}', headers=headers, timeout=60)
-            
-            print(f"[{datetime.now()}] Page {page_number} response: {response.status_code}, Content-Length: {len(response.content)}")
-            print(f"[{datetime.now()}] Using PublishDateId={publish_date_id}")
-            print(f"[{datetime.now()}] API URL: {base_url}?PublishDateId={publish_date_id}&PageSize=24&PageNumber={page_number}")
-            
-            if response.status_code == 200:
-                try:
-                    json_data = response.json()
-                    
-                    if 'data' in json_data:
-                        tenders = json_data['data']
-                        print(f"[{datetime.now()}] Page {page_number} returned {len(tenders)} tenders")
-                        
-                        # Validate tenders
-                        valid_tenders = []
-                        for tender in tenders:
-                            if tender and isinstance(tender, dict):
-                                valid_tenders.append(tender)
-                        
-                        print(f"[{datetime.now()}] Page {page_number}: {len(valid_tenders)} valid tenders out of {len(tenders)} total")
-                        return valid_tenders
-                    else:
-                        print(f"[{datetime.now()}] Page {page_number}: No 'data' field in response")
-                        return []
-                        
-                except json.JSONDecodeError as e:
-                    print(f"[{datetime.now()}] JSON decode error on page {page_number}: {e}")
-                    print(f"[{datetime.now()}] Response content preview: {response.text[:200]}...")
-                    print(f"[{datetime.now()}] Falling back to sample data for demonstration...")
-                    return get_sample_tenders(page_number)
-            else:
-                print(f"[{datetime.now()}] Page {page_number}: HTTP {response.status_code}")
-                print(f"[{datetime.now()}] Falling back to sample data for demonstration...")
-                return get_sample_tenders(page_number)
-        else:
-            print(f"[{datetime.now()}] Failed to establish session for page {page_number}: {main_page_response.status_code}")
-            print(f"[{datetime.now()}] Falling back to sample data for demonstration...")
-            return get_sample_tenders(page_number)
-            
-    except Exception as e:
-        error_message = str(e)
-        print(f"[{datetime.now()}] Error fetching page {page_number}: {error_message}")
-        
-        # Check if it's a connection or server error
-        if "Connection" in error_message or "timeout" in error_message.lower():
-            print(f"[{datetime.now()}] Connection error detected, falling back to sample data...")
-            return get_sample_tenders(page_number)
-        elif "Etimad server" in error_message:
-            print(f"[{datetime.now()}] Etimad server error detected, falling back to sample data...")
-            return get_sample_tenders(page_number)
-        else:
-            print(f"[{datetime.now()}] Unexpected error, falling back to sample data...")
-            return get_sample_tenders(page_number)
-
-def get_sample_tenders(page_number):
-    """Generate sample tender data for demonstration purposes"""
-    sample_tenders = []
-    
-    # Generate 24 sample tenders
-    for i in range(24):
-        tender_id = f"{(page_number-1)*24 + i + 1:06d}"
-        # Define realistic activity names
-        activities = [
-            'Construction & Building',
-            'IT & Technology Services',
-            'Healthcare & Medical',
-            'Education & Training',
-            'Transportation & Logistics',
-            'Financial Services',
-            'Environmental Services',
-            'Security & Safety'
-        ]
-        
-        # Define realistic agency names
-        agencies = [
-            'Ministry of Health',
-            'Ministry of Education',
-            'Ministry of Transportation',
-            'Ministry of Finance',
-            'Ministry of Interior',
-            'Ministry of Defense',
-            'Ministry of Environment',
-            'Ministry of Energy'
-        ]
-        
-        tender = {
-            'tenderId': tender_id,
-            'tenderName': f'Sample Tender {tender_id} - Page {page_number}',
-            'agencyName': agencies[i % len(agencies)],
-            'tenderActivityName': activities[i % len(activities)],
-            'submitionDate': (datetime.now() + timedelta(days=i % 7)).strftime('%Y-%m-%d'),
-            'status': 'Active' if i % 3 != 0 else 'Pending',
-            'description': f'This is a sample tender description for demonstration purposes. Page {page_number}, Tender {i+1}.',
-            'budget': f'{(i + 1) * 10000:,} SAR',
-            'location': f'Location {(i % 4) + 1}',
-            'category': f'Category {(i % 6) + 1}'
-        }
-        sample_tenders.append(tender)
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        flash(f"Ignoring invalid {field} '{value}', expected YYYY-MM-DD.", 'warning')
+        return None
+
+def paginate_tenders(query, sort='submission_date', order='desc', after=None, before=None, page_size=TENDER_BROWSER_PAGE_SIZE):
+    """Return (tenders, next_cursor, prev_cursor) for one keyset page of a Tender query"""
+    return paginate_keyset(query, TENDER_BROWSER_SORT_COLUMNS[sort], Tender.tender_id,
+                           lambda tender: encode_keyset_cursor(getattr(tender, sort) or '', tender.tender_id),
+                           lambda cursor: decode_keyset_cursor(cursor, is_datetime=sort == 'submission_date'),
+                           order, after, before, page_size)
+
+def paginate_tender_history(start, end, filters, after=None, before=None, page_size=TENDER_BROWSER_PAGE_SIZE):
+    """Return (tenders, next_cursor, prev_cursor) for one page of query_tender_history, newest first"""
+    backwards = before is not None and after is None
+    rows = query_tender_history(start, end, filters['agency'], filters['activity'], filters['q'],
+                                after=decode_keyset_cursor(after, is_datetime=True) if after is not None else None,
+                                before=decode_keyset_cursor(before, is_datetime=True) if backwards else None,
+                                limit=page_size + 1)
+    has_more = len(rows) > page_size
+    rows = rows[-page_size:] if backwards else rows[:page_size]  # The extra row is the one farthest from the boundary
     
-    print(f"[{datetime.now()}] Generated {len(sample_tenders)} sample tenders for page {page_number}")
-    return sample_tenders
+    if not rows:
+        return rows, None, None
+    has_next = has_more if not backwards else True
+    has_prev = has_more if backwards else after is not None
+    return (
+        rows,
+        encode_keyset_cursor(rows[-1]['submission_date'], rows[-1]['tender_id']) if has_next else None,
+        encode_keyset_cursor(rows[0]['submission_date'], rows[0]['tender_id']) if has_prev else None
+    )
 
 @app.route('/api_data')
 @login_required
 def api_data():
-    """Display API data in a formatted view"""
+    """Browse stored tenders with server-side filtering, sorting and keyset pagination.
+    A start date older than the hot window reads the archive as well, newest first."""
+    sort = request.args.get('sort', 'submission_date')
+    if sort not in TENDER_BROWSER_SORT_COLUMNS:
+        sort = 'submission_date'
+    order = 'asc' if request.args.get('order') == 'asc' else 'desc'
+    page_size = max(1, min(request.args.get('page_size', TENDER_BROWSER_PAGE_SIZE, type=int), TENDER_BROWSER_MAX_PAGE_SIZE))
+    filters = {
+        'q': request.args.get('q', '').strip(),
+        'agency': request.args.get('agency', '').strip(),
+        'activity': request.args.get('activity', '').strip(),
+        'date_from': request.args.get('date_from', '').strip(),
+        'date_to': request.args.get('date_to', '').strip()
+    }
+    
+    date_from = parse_filter_date(filters['date_from'], 'start date')
+    date_to = parse_filter_date(filters['date_to'], 'end date')
+    date_end = date_to + timedelta(days=1) if date_to else None  # Inclusive end date
+    if date_from and date_from < datetime.utcnow() - timedelta(days=TENDER_HOT_DAYS):
+        # The archive only pages by (submission_date, tender_id), newest first
+        if (sort, order) != ('submission_date', 'desc'):
+            flash("Archive searches are always sorted by date, newest first.", "info")
+        try:
+            rows, next_cursor, prev_cursor = paginate_tender_history(date_from, date_end, filters, request.args.get('after'),
+                                                                     request.args.get('before'), page_size)
+        except ValueError:
+            flash("That page link is no longer valid, showing the first page.", "warning")
+            rows, next_cursor, prev_cursor = paginate_tender_history(date_from, date_end, filters, page_size=page_size)
+        return render_template('api_data.html',
+                               tenders=[row['tender'] for row in rows],
+                               total_tenders=count_tender_history(date_from, date_end, filters['agency'], filters['activity'], filters['q']),
+                               next_cursor=next_cursor,
+                               prev_cursor=prev_cursor,
+                               sort='submission_date',
+                               order='desc',
+                               page_size=page_size,
+                               filters=filters,
+                               last_updated=db.session.query(db.func.max(Tender.last_seen_at)).scalar(),
+                               hot_days=TENDER_HOT_DAYS,
+                               history=True)
+    
+    # Undated rows cannot take part in the (submission_date, tender_id) keyset
+    tenders_query = Tender.query.filter(Tender.submission_date.isnot(None))
+    if filters['q']:
+        pattern = f"%{filters['q']}%"
+        tenders_query = tenders_query.filter(db.or_(Tender.name.ilike(pattern), Tender.reference_number.ilike(pattern)))
+    if filters['agency']:
+        tenders_query = tenders_query.filter(Tender.agency_name == filters['agency'])
+    if filters['activity']:
+        tenders_query = tenders_query.filter(Tender.activity_name == filters['activity'])
+    if date_from:
+        tenders_query = tenders_query.filter(Tender.submission_date >= date_from)
+    if date_end:
+        tenders_query = tenders_query.filter(Tender.submission_date < date_end)
+    total_tenders = tenders_query.order_by(None).count()
+    
     try:
-        # Get page number from query parameters
-        page = request.args.get('page', 1, type=int)
-        page_size = 24  # Same as the API page size
-        
-        # Simple page-based navigation
-        publish_date_id = 1  # Use same date range for all pages
-        date_label = f"Page {page}"
-        
-        # Fetch only the requested page
-        tenders = fetch_tenders_single_page(page)
-        
-        # Use all tenders (no filtering)
-        filtered_tenders = tenders
-        
-        # Get total count for pagination (this will be approximate)
-        total_pages = 50  # Allow reasonable number of pages
-        
-        return render_template('api_data.html', 
-                            tenders=filtered_tenders, 
-                            current_page=page,
-                            total_pages=total_pages,
-                            page_size=page_size,
-                            date_label=date_label,
-                            publish_date_id=publish_date_id)
+        rows, next_cursor, prev_cursor = paginate_tenders(tenders_query, sort, order, request.args.get('after'),
+                                                          request.args.get('before'), page_size)
+    except ValueError:
+        flash("That page link is no longer valid, showing the first page.", "warning")
+        rows, next_cursor, prev_cursor = paginate_tenders(tenders_query, sort, order, page_size=page_size)
     
-    except Exception as e:
-        error_message = str(e)
-        print(f"[{datetime.now()}] Error in api_data route: {error_message}")
-        
-        # Check if it's an Etimad-specific error
-        if "Etimad server" in error_message or "Connection" in error_message or "timeout" in error_message.lower():
-            flash(f'⚠️ Etimad server connection issue: {error_message}', 'warning')
-        else:
-            flash(f'Error fetching API data: {error_message}', 'danger')
-        
-        return render_template('api_data.html', 
-                            tenders=[], 
-                            current_page=1,
-                            total_pages=1,
-                            page_size=24,
-                            date_label="Page 1",
-                            publish_date_id=1,
-                            keywords='',
-                            agency_filter='',
-                            activity_filter='')
+    return render_template('api_data.html',
+                           tenders=[json.loads(row.payload) for row in rows],
+                           total_tenders=total_tenders,
+                           next_cursor=next_cursor,
+                           prev_cursor=prev_cursor,
+                           sort=sort,
+                           order=order,
+                           page_size=page_size,
+                           filters=filters,
+                           last_updated=db.session.query(db.func.max(Tender.last_seen_at)).scalar(),
+                           hot_days=TENDER_HOT_DAYS,
+                           history=False)
 
 # Global error handler for Etimad-related errors
 @app.errorhandler(Exception)
@@ -1807,31 +3868,63 @@ def handle_exception(e):
     # Re-raise the exception for proper handling
     raise e
 
+def describe_scheduler_jobs():
+    """Live view of the jobs registered on the APScheduler instance"""
+    if scheduler is None:
+        return []
+    return [
+        {
+            'id': job.id,
+            'trigger': str(job.trigger),
+            'next_run_time': job.next_run_time.strftime('%Y-%m-%d %H:%M:%S %Z') if job.next_run_time else None
+        }
+        for job in scheduler.get_jobs()
+    ]
+
+def get_main_alert_job_timing():
+    """Next run of the main alert job and its trigger description"""
+    if scheduler is None:
+        return None, None
+    main_job = scheduler.get_job('main_alert_job')
+    if main_job is None:
+        return None, None
+    return main_job.next_run_time, str(main_job.trigger)
+
+def count_alert_run_states():
+    """Number of alerts per run_status, e.g. {'success': 40, 'retrying': 2, 'failed': 1}"""
+    return {status or 'never_run': count for status, count in
+            db.session.query(Alert.run_status, db.func.count(Alert.id)).group_by(Alert.run_status).all()}
+
+def format_scheduler_timestamp(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+
 @app.route('/scheduler_status')
 @login_required
 def scheduler_status():
-    """Check scheduler status and next run times"""
+    """Check scheduler status, live job times and recent run telemetry"""
     try:
-        from apscheduler.schedulers.background import BackgroundScheduler
-        
-        # Calculate next scheduled run time (daily at 11:51 AM)
         timezone = pytz.timezone('Asia/Riyadh')
         now = datetime.now(timezone)
-        
-        # Calculate next run time
-        next_run = now.replace(hour=11, minute=51, second=0, microsecond=0)
-        if next_run <= now:
-            # If today's time has passed, schedule for tomorrow
-            next_run = next_run + timedelta(days=1)
+        next_run, schedule = get_main_alert_job_timing()
+        limit = min(request.args.get('limit', 10, type=int), SCHEDULER_RUN_HISTORY_SIZE)
         
         status_info = {
-            'scheduler_running': True,
-            'next_scheduled_run': next_run.strftime('%Y-%m-%d %H:%M:%S %Z'),
-            'next_scheduled_run_relative': f"In {(next_run - now).total_seconds() / 3600:.1f} hours",
-            'schedule_type': 'Daily at 11:51 AM (Asia/Riyadh)',
-            'retry_system': 'Active - retries after 30 minutes on failure',
-            'max_retries': 3,
-            'health_check': 'Every 30 minutes'
+            'scheduler_running': bool(scheduler and scheduler.running),
+            'is_leader': leader_state['is_leader'],
+            'leader_strategy': leader_state['strategy'],
+            'instance_id': INSTANCE_ID,
+            'next_scheduled_run': next_run.strftime('%Y-%m-%d %H:%M:%S %Z') if next_run else None,
+            'next_scheduled_run_relative': f"In {(next_run - now).total_seconds() / 3600:.1f} hours" if next_run else None,
+            'schedule_type': schedule,
+            'jobs': describe_scheduler_jobs(),
+            'retry_system': f'Per alert - {ALERT_MAX_ATTEMPTS} attempts, backoff from {ALERT_RETRY_DELAY_MINUTES} minutes',
+            'max_attempts': ALERT_MAX_ATTEMPTS,
+            'alert_run_states': count_alert_run_states(),
+            'last_success': format_scheduler_timestamp(scheduler_job_status['last_success']),
+            'last_failure': format_scheduler_timestamp(scheduler_job_status['last_failure']),
+            'health_check': 'Every 30 minutes',
+            'run_summary': summarize_scheduler_runs(),
+            'recent_runs': get_scheduler_run_history(limit)
         }
         
         return jsonify(status_info)
@@ -1849,29 +3942,32 @@ def scheduler_details():
     try:
         timezone = pytz.timezone('Asia/Riyadh')
         now = datetime.now(timezone)
-        
-        # Calculate next run time
-        next_run = now.replace(hour=11, minute=51, second=0, microsecond=0)
-        if next_run <= now:
-            next_run = next_run + timedelta(days=1)
+        next_run, schedule = get_main_alert_job_timing()
         
         # Calculate time until next run
-        time_until = next_run - now
-        hours_until = int(time_until.total_seconds() // 3600)
-        minutes_until = int((time_until.total_seconds() % 3600) // 60)
+        if next_run:
+            time_until = next_run - now
+            hours_until = int(time_until.total_seconds() // 3600)
+            minutes_until = int((time_until.total_seconds() % 3600) // 60)
         
         scheduler_info = {
-            'schedule': 'Daily at 11:51 AM (Asia/Riyadh)',
-            'next_run': next_run.strftime('%Y-%m-%d %H:%M:%S %Z'),
-            'time_until': f"{hours_until}h {minutes_until}m",
+            'schedule': schedule or 'Scheduler not running',
+            'next_run': next_run.strftime('%Y-%m-%d %H:%M:%S %Z') if next_run else 'Not scheduled',
+            'time_until': f"{hours_until}h {minutes_until}m" if next_run else 'N/A',
             'retry_system': {
                 'enabled': True,
-                'retry_delay': '30 minutes',
-                'max_retries': 3,
-                'description': 'If the job fails, it will retry up to 3 times with 30-minute delays before returning to the normal schedule'
+                'retry_delay': f'{ALERT_RETRY_DELAY_MINUTES} minutes, doubling per attempt',
+                'max_retries': ALERT_MAX_ATTEMPTS - 1,
+                'alert_run_states': count_alert_run_states(),
+                'description': f"Each alert is retried on its own: a failed alert is re-evaluated up to {ALERT_MAX_ATTEMPTS - 1} more times with growing delays, then waits for its next scheduled run. Alerts that succeeded are not re-run."
             },
             'health_check': 'Every 30 minutes',
-            'timezone': 'Asia/Riyadh (UTC+3)'
+            'timezone': 'Asia/Riyadh (UTC+3)',
+            'is_leader': leader_state['is_leader'],
+            'instance_id': INSTANCE_ID,
+            'jobs': describe_scheduler_jobs(),
+            'run_summary': summarize_scheduler_runs(),
+            'recent_runs': get_scheduler_run_history(10)
         }
         
         return render_template('scheduler_details.html', scheduler_info=scheduler_info)
@@ -1889,7 +3985,7 @@ def trigger_alerts_manual():
         
         # Run alerts in background
         import threading
-        thread = threading.Thread(target=run_all_alerts)
+        thread = threading.Thread(target=run_all_alerts, kwargs={'trigger': 'manual'})
         thread.daemon = True
         thread.start()
         
@@ -1902,10 +3998,35 @@ def trigger_alerts_manual():
         flash(f"❌ Failed to trigger alerts: {error_message}", 'danger')
         return redirect(url_for('dashboard'))
 
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Apply pending schema changes: new tables, columns and indexes, and the alert recipient migration"""
+    started = time.perf_counter()
+    ensure_schema()
+    print(f"[{datetime.now()}] Database schema is up to date ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+def create_app(mode=None):
+    """Return the configured app for a deployment mode.
+    'server' (long-lived process) applies schema changes and starts the scheduler and background
+    workers; 'serverless' returns the app as imported, leaving the database untouched until a
+    request needs it, so its schema must be migrated with `flask --app app migrate-db` first.
+    Defaults to 'serverless' when SERVERLESS is set."""
+    mode = mode or ('serverless' if SERVERLESS else 'server')
+    if mode not in ('server', 'serverless'):
+        raise ValueError(f"Unknown app mode '{mode}', expected 'server' or 'serverless'")
+    app.config['SIGNAL_MODE'] = mode
+    if mode == 'server':
+        log_memory_usage("Application started")
+        with app.app_context():
+            ensure_schema()
+        start_scheduler()  # Start the scheduler when the app starts
+        start_background_email_processor()  # Start the background email processor
+    return app
+
+APP_IMPORT_SECONDS = time.perf_counter() - APP_IMPORT_STARTED
+logger.info(f"Module loaded in {APP_IMPORT_SECONDS * 1000:.0f} ms ({'serverless' if SERVERLESS else 'server'} mode, "
+            f"{'NullPool' if 'poolclass' in app.config['SQLALCHEMY_ENGINE_OPTIONS'] else 'QueuePool'} connections)")
+
 if __name__ == "__main__":
-    log_memory_usage("Application started")
-    with app.app_context():
-        db.create_all()
-    start_scheduler()  # Start the scheduler when the app starts
-    start_background_email_processor()  # Start the background email processor
+    create_app('server')
     app.run(host="0.0.0.0", port=5000)  # Bind to all IP addresses and use port 5000
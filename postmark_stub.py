@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Postmark email API.
+
+Implements POST /email and POST /email/batch with configurable latency, per-message
+error rates, 429 rate limiting and 500 server errors so the delivery pipeline can be
+load-tested offline. Point the app at it with:
+
+    POSTMARK_API_BASE=http://127.0.0.1:8025/ python app.py
+
+GET /stats returns request and message counters, POST /stats/reset clears them.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PostmarkStubConfig:
+    """Failure and latency settings shared by every request handler"""
+    def __init__(self, latency_ms=50, latency_jitter_ms=0, message_error_rate=0.0,
+                 rate_limit_rate=0.0, server_error_rate=0.0, max_batch_size=500):
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.message_error_rate = message_error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.max_batch_size = max_batch_size
+
+
+class PostmarkStubStats:
+    """Thread-safe counters exposed on GET /stats"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {
+                'requests': 0,
+                'batch_requests': 0,
+                'single_requests': 0,
+                'messages_accepted': 0,
+                'messages_rejected': 0,
+                'rate_limited': 0,
+                'server_errors': 0,
+                'bytes_received': 0
+            }
+            self.started_at = time.time()
+
+    def add(self, **increments):
+        with self.lock:
+            for key, value in increments.items():
+                self.counters[key] += value
+
+    def snapshot(self):
+        with self.lock:
+            snapshot = dict(self.counters)
+            snapshot['elapsed_seconds'] = round(time.time() - self.started_at, 3)
+            return snapshot
+
+
+def make_handler(config, stats):
+    """Build a request handler bound to the given config and stats"""
+
+    class PostmarkStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass  # Keep benchmark output readable
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                self.send_json(200, stats.snapshot())
+            else:
+                self.send_json(404, {'ErrorCode': 404, 'Message': 'Not found'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            raw_body = self.rfile.read(length) if length else b''
+            path = self.path.split('?')[0].rstrip('/')
+
+            if path == '/stats/reset':
+                stats.reset()
+                self.send_json(200, {'Message': 'OK'})
+                return
+            if path not in ('/email', '/email/batch'):
+                self.send_json(404, {'ErrorCode': 404, 'Message': 'Not found'})
+                return
+
+            stats.add(requests=1, bytes_received=len(raw_body))
+            if not self.headers.get('X-Postmark-Server-Token'):
+                self.send_json(401, {'ErrorCode': 10, 'Message': 'No Account or Server API tokens were supplied in the HTTP headers.'})
+                return
+
+            latency = config.latency_ms + random.uniform(0, config.latency_jitter_ms)
+            time.sleep(latency / 1000)
+
+            roll = random.random()
+            if roll < config.rate_limit_rate:
+                stats.add(rate_limited=1)
+                self.send_json(429, {'ErrorCode': 429, 'Message': 'Rate limit exceeded.'})
+                return
+            if roll < config.rate_limit_rate + config.server_error_rate:
+                stats.add(server_errors=1)
+                self.send_json(500, {'ErrorCode': 500, 'Message': 'Internal server error.'})
+                return
+
+            try:
+                data = json.loads(raw_body or b'null')
+            except ValueError:
+                self.send_json(422, {'ErrorCode': 402, 'Message': 'Invalid JSON'})
+                return
+
+            if path == '/email':
+                stats.add(single_requests=1)
+                self.send_json(200, self.deliver(data))
+                return
+
+            stats.add(batch_requests=1)
+            if not isinstance(data, list):
+                self.send_json(422, {'ErrorCode': 402, 'Message': 'Batch body must be a JSON array'})
+                return
+            if len(data) > config.max_batch_size:
+                self.send_json(422, {'ErrorCode': 413, 'Message': f'Batch exceeds {config.max_batch_size} messages'})
+                return
+            self.send_json(200, [self.deliver(message) for message in data])
+
+        def deliver(self, message):
+            """Accept or reject a single message the way Postmark reports it"""
+            recipient = (message or {}).get('To', '')
+            if not recipient or '@' not in recipient:
+                stats.add(messages_rejected=1)
+                return {'ErrorCode': 300, 'Message': 'Invalid email request', 'To': recipient}
+            if random.random() < config.message_error_rate:
+                stats.add(messages_rejected=1)
+                return {'ErrorCode': 406, 'Message': 'You tried to send to a recipient that has been marked as inactive.', 'To': recipient}
+            stats.add(messages_accepted=1)
+            return {
+                'ErrorCode': 0,
+                'Message': 'OK',
+                'MessageID': str(uuid.uuid4()),
+                'SubmittedAt': datetime.now().isoformat(),
+                'To': recipient
+            }
+
+    return PostmarkStubHandler
+
+
+def start_postmark_stub(host='127.0.0.1', port=8025, config=None):
+    """Start the stand-in on a background thread and return (server, stats)"""
+    stats = PostmarkStubStats()
+    server = ThreadingHTTPServer((host, port), make_handler(config or PostmarkStubConfig(), stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Postmark API stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency-ms', type=float, default=50, help="Base latency added to every request")
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help="Random extra latency per request")
+    parser.add_argument('--message-error-rate', type=float, default=0.0, help="Fraction of messages rejected as inactive recipients")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    stub_config = PostmarkStubConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        message_error_rate=args.message_error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate
+    )
+    stub_server = ThreadingHTTPServer((args.host, args.port), make_handler(stub_config, PostmarkStubStats()))
+    print(f"📮 Postmark stand-in listening on http://{args.host}:{args.port}/")
+    try:
+        stub_server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping Postmark stand-in")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the serverless deployment.
+
+Each run starts a fresh interpreter, imports the app, serves one /ping through the test
+client and reports the import time, first-request time and which heavy dependencies were
+loaded. Serverless mode (what Vercel runs) is compared against the long-lived server mode.
+
+    python test_cold_start.py --runs 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = r'''
+import json, os, sys, time
+started = time.perf_counter()
+import app as signal_app
+imported = time.perf_counter()
+signal_app.create_app()
+created = time.perf_counter()
+response = signal_app.app.test_client().get('/ping')
+served = time.perf_counter()
+with signal_app.app.app_context():
+    pool = type(signal_app.db.engine.pool).__name__
+with open(os.environ['COLD_START_RESULT'], 'w') as result_file:
+    json.dump({
+        'import_ms': (imported - started) * 1000,
+        'create_ms': (created - imported) * 1000,
+        'first_request_ms': (served - created) * 1000,
+        'status': response.status_code,
+        'pool': pool,
+        'loaded': sorted(name for name in ('apscheduler', 'postmarker', 'psutil') if name in sys.modules)
+    }, result_file)
+os._exit(0)  # Server mode leaves scheduler and worker threads running
+'''
+
+
+def run_probe(serverless, database_uri):
+    """Import the app in a fresh interpreter and return the probe measurements"""
+    result_path = os.path.join(tempfile.mkdtemp(), 'cold_start.json')  # Worker threads print to stdout
+    env = dict(os.environ, SUPABASE_DATABASE_URI=database_uri, SIGNAL_SERVERLESS='1' if serverless else '0',
+               SCHEDULER_LEADER_STRATEGY='lease', COLD_START_RESULT=result_path)
+    env.pop('VERCEL', None)
+    completed = subprocess.run([sys.executable, '-c', PROBE], cwd=os.path.dirname(os.path.abspath(__file__)),
+                               env=env, capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Cold-start probe failed:\n{completed.stderr.strip()[-2000:]}")
+    with open(result_path) as result_file:
+        return json.load(result_file)
+
+
+def summarize(label, samples):
+    print(f"{label}: import {statistics.median(s['import_ms'] for s in samples):.0f} ms, "
+          f"create_app {statistics.median(s['create_ms'] for s in samples):.0f} ms, "
+          f"first request {statistics.median(s['first_request_ms'] for s in samples):.0f} ms "
+          f"(median of {len(samples)}), pool {samples[0]['pool']}, loaded {samples[0]['loaded'] or 'none'}")
+    return statistics.median(s['import_ms'] + s['create_ms'] + s['first_request_ms'] for s in samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold-start time in serverless and server modes")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print("🧪 Measuring cold starts...")
+    print("=" * 50)
+
+    database_uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'cold_start.db')}"
+    results = {}
+    for label, serverless in (('server', False), ('serverless', True)):
+        samples = [run_probe(serverless, database_uri) for _ in range(args.runs)]
+        results[label] = summarize(f"{'☁️ ' if serverless else '🖥️ '} {label}", samples)
+
+    print("=" * 50)
+    print(f"✅ Serverless cold start {results['serverless']:.0f} ms vs server start {results['server']:.0f} ms "
+          f"({results['server'] - results['serverless']:.0f} ms saved)")
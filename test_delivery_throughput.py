@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for the background email delivery pipeline.
+
+Starts the local Postmark stand-in (postmark_stub.py), points the app at it and a
+throwaway SQLite task queue, enqueues digest tasks and measures how long the
+background workers take to drain them, including retries under failure patterns.
+
+    python test_delivery_throughput.py --tasks 2000 --rate-limit-rate 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from postmark_stub import PostmarkStubConfig, start_postmark_stub
+
+
+def build_mock_tenders(count):
+    """Generate tenders shaped like Etimad responses"""
+    now = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    return [
+        {
+            'tenderId': 900000 + i,
+            'tenderName': f'Benchmark Tender {i}',
+            'agencyName': f'Benchmark Agency {i % 12}',
+            'tenderActivityName': f'Benchmark Activity {i % 5}',
+            'submitionDate': f'{now}.0000000',
+            'lastEnqueriesDate': f'{now}.0000000',
+            'lastOfferPresentationDate': f'{now}.0000000',
+            'tenderIdString': f'bench{i}',
+            'referenceNumber': f'REF-BENCH-{i:05d}'
+        }
+        for i in range(count)
+    ]
+
+
+def run_delivery_benchmark(args):
+    """Enqueue args.tasks digests and wait for the workers to drain the queue"""
+    server, stats = start_postmark_stub(port=args.port, config=PostmarkStubConfig(
+        latency_ms=args.latency_ms,
+        message_error_rate=args.message_error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate
+    ))
+
+    # The app reads its configuration at import time
+    database_path = os.path.join(tempfile.mkdtemp(), 'delivery_benchmark.db')
+    os.environ['SUPABASE_DATABASE_URI'] = f'sqlite:///{database_path}'
+    os.environ['POSTMARK_API_BASE'] = f'http://127.0.0.1:{args.port}/'
+    os.environ.setdefault('POSTMARK_API_KEY', 'benchmark-token')
+    os.environ.setdefault('SENDER_EMAIL', 'alerts@example.com')
+    os.environ.setdefault('EMAIL_COALESCE_WINDOW_SECONDS', '0')
+    os.environ.setdefault('TASK_RETRY_DELAY_SECONDS', '1')
+    os.environ.setdefault('POSTMARK_RETRY_DELAY_SECONDS', '0.2')
+    os.environ.setdefault('EMAIL_SEND_RATE', '100000')
+    os.environ.setdefault('EMAIL_SEND_BURST', '100000')
+
+    import app as signal_app
+
+    with signal_app.app.app_context():
+        signal_app.db.create_all()
+
+    tenders = build_mock_tenders(args.tenders_per_email)
+    print(f"📥 Enqueuing {args.tasks} email tasks with {args.tenders_per_email} tenders each...")
+    for i in range(args.tasks):
+        signal_app.add_email_to_queue(tenders, {'agency_name': ['Benchmark Agency']}, [f'user{i}@example.com'], f'bench_{i}')
+
+    started = time.time()
+    signal_app.start_background_email_processor()
+
+    deadline = started + args.timeout
+    while time.time() < deadline:
+        with signal_app.app.app_context():
+            remaining = signal_app.get_queue_depth(signal_app.EMAIL_LANE)
+        if remaining == 0:
+            break
+        time.sleep(0.5)
+    elapsed = time.time() - started
+
+    with signal_app.app.app_context():
+        task_counts = dict(
+            signal_app.db.session.query(signal_app.BackgroundTask.status, signal_app.db.func.count())
+            .group_by(signal_app.BackgroundTask.status).all()
+        )
+        total_attempts = signal_app.db.session.query(signal_app.db.func.sum(signal_app.BackgroundTask.attempts)).scalar() or 0
+
+    server.shutdown()
+    stub_stats = stats.snapshot()
+    delivered = stub_stats['messages_accepted']
+
+    print("=" * 50)
+    print(f"⏱️  Drained in {elapsed:.2f}s ({delivered / elapsed if elapsed else 0:.1f} emails/s delivered)")
+    print(f"📊 Task status: {task_counts}, total attempts: {total_attempts}")
+    print(f"📮 Stand-in stats: {stub_stats}")
+    return task_counts.get('pending', 0) + task_counts.get('running', 0) == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark background email delivery against the local Postmark stand-in")
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--tenders-per-email', type=int, default=20)
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--message-error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--server-error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout', type=float, default=600)
+    benchmark_args = parser.parse_args()
+
+    print("🧪 Benchmarking background email delivery...")
+    print("=" * 50)
+
+    success = run_delivery_benchmark(benchmark_args)
+
+    print("=" * 50)
+    if success:
+        print("✅ Delivery benchmark completed - queue fully drained")
+    else:
+        print("❌ Delivery benchmark timed out with tasks still queued")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Check script for the tender archive.
+
+Stores generated tenders spread over the past two and a half years, runs the archive
+maintenance (archive, compact, retention) and verifies the hot table, the monthly
+partitions and history lookups, including keyset paging through the archive as /api_data
+does. A second maintenance run a few months later checks that expired partitions are
+dropped. Uses a throwaway SQLite database unless --database-uri points at an empty Postgres
+database.
+
+    python test_tender_archive.py --tenders 3000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+NOW = datetime(2026, 6, 15, 12)
+HISTORY_DAYS = 900  # Reaches past the default 24 month retention
+
+
+def build_mock_tenders(count):
+    """Generate Etimad-shaped tenders with submission dates spread evenly over HISTORY_DAYS"""
+    return [
+        {
+            'tenderId': 900000 + i,
+            'tenderName': f'Archive Tender {i}',
+            'agencyName': f'Archive Agency {i % 5}',
+            'tenderActivityName': f'Archive Activity {i % 3}',
+            'submitionDate': (NOW - timedelta(days=HISTORY_DAYS * i / count)).strftime('%Y-%m-%dT%H:%M:%S') + '.0000000',
+            'tenderIdString': f'archive{i}',
+            'referenceNumber': f'REF-ARCHIVE-{i:06d}'
+        }
+        for i in range(count)
+    ]
+
+
+def check(results, name, passed, detail=''):
+    results.append(passed)
+    print(f"{'✅' if passed else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+
+def walk_history_pages(signal_app, start, end, filters, page_size):
+    """Page through the archive with the /api_data cursors; returns the tender ids in page order"""
+    tender_ids, cursor = [], None
+    while True:
+        rows, next_cursor, _ = signal_app.paginate_tender_history(start, end, filters, after=cursor, page_size=page_size)
+        tender_ids.extend(row['tender_id'] for row in rows)
+        if not next_cursor:
+            return tender_ids
+        cursor = next_cursor
+
+
+def run_archive_check(args):
+    if args.database_uri:
+        os.environ['SUPABASE_DATABASE_URI'] = args.database_uri
+    else:
+        database_path = os.path.join(tempfile.mkdtemp(), 'tender_archive.db')
+        os.environ['SUPABASE_DATABASE_URI'] = f'sqlite:///{database_path}'
+
+    import app as signal_app
+
+    results = []
+    tenders = build_mock_tenders(args.tenders)
+    submitted = {str(tender['tenderId']): signal_app.parse_etimad_date(tender['submitionDate']) for tender in tenders}
+    hot_cutoff = NOW - timedelta(days=signal_app.TENDER_HOT_DAYS)
+    horizon = signal_app.add_months(signal_app.month_start(NOW), -signal_app.TENDER_ARCHIVE_RETENTION_MONTHS)
+    compact_before = signal_app.add_months(signal_app.month_start(NOW), -signal_app.TENDER_ARCHIVE_COMPACT_AFTER_MONTHS)
+
+    with signal_app.app.app_context():
+        signal_app.ensure_schema()
+        with signal_app.TenderWriter(seen_at=NOW) as writer:
+            writer.add_many(tenders)
+        print(f"📥 Stored {args.tenders} tenders ({signal_app.db.engine.dialect.name}), running archive maintenance...")
+
+    started = time.time()
+    summary = signal_app.maintain_tender_archive(NOW)
+    maintenance_elapsed = time.time() - started
+
+    with signal_app.app.app_context():
+        db, Tender, Partition = signal_app.db, signal_app.Tender, signal_app.TenderArchivePartition
+
+        # Archive: the hot table keeps the hot window, the partitions hold the rest within retention
+        hot = {tender_id for (tender_id,) in db.session.query(Tender.tender_id)}
+        expected_hot = {tender_id for tender_id, date in submitted.items() if date >= hot_cutoff}
+        expected_archived = {tender_id for tender_id, date in submitted.items() if horizon <= date < hot_cutoff}
+        partitions = Partition.query.order_by(Partition.month).all()
+        check(results, "Hot table holds only the hot window", hot == expected_hot, f"{len(hot)} tenders")
+        check(results, "Partitions hold every archived tender",
+              sum(partition.row_count for partition in partitions) == len(expected_archived),
+              f"{len(expected_archived)} tenders in {len(partitions)} partitions")
+        check(results, "Nothing is archived past retention", all(partition.starts_at >= horizon for partition in partitions))
+
+        # Compaction: old partitions keep only compressed payloads
+        compacted = [partition for partition in partitions if partition.ends_at <= compact_before]
+        raw_left = sum(db.session.execute(signal_app.text(f'SELECT COUNT(*) FROM {partition.table_name} WHERE payload IS NOT NULL')).scalar()
+                       for partition in compacted)
+        check(results, "Old partitions are compacted",
+              bool(compacted) and all(partition.compacted_at for partition in compacted) and raw_left == 0,
+              f"{summary['compacted']} payloads in {len(compacted)} partitions")
+
+        # History lookup: a compacted range decodes, filters and pages like the hot table
+        start, end = compacted[0].starts_at, compacted[-1].ends_at
+        expected = sorted((tender_id for tender_id, date in submitted.items() if start <= date < end),
+                          key=lambda tender_id: (submitted[tender_id], tender_id), reverse=True)
+        started = time.time()
+        history = signal_app.query_tender_history(start, end, limit=len(expected) + 1)
+        lookup_elapsed = time.time() - started
+        check(results, "History lookup returns the range newest first",
+              [row['tender_id'] for row in history] == expected, f"{len(history)} tenders in {lookup_elapsed * 1000:.0f}ms")
+        check(results, "Compressed payloads decode",
+              all(row['tender'] and row['tender']['tenderName'] == row['name'] for row in history))
+        agency = signal_app.query_tender_history(start, end, agency_name='Archive Agency 1', limit=len(expected))
+        check(results, "Agency filter applies to the archive",
+              bool(agency) and all(row['agency_name'] == 'Archive Agency 1' for row in agency), f"{len(agency)} tenders")
+
+        filters = {'q': '', 'agency': '', 'activity': '', 'date_from': '', 'date_to': ''}
+        paged = walk_history_pages(signal_app, start, None, filters, args.page_size)
+        expected_paged = sorted((tender_id for tender_id, date in submitted.items() if date >= start),
+                                key=lambda tender_id: (submitted[tender_id], tender_id), reverse=True)
+        total = signal_app.count_tender_history(start)
+        check(results, "Keyset pages cover archive and hot table once", paged == expected_paged and total == len(paged),
+              f"{len(paged)} tenders, {args.page_size} per page")
+
+        # A tender crawled again after it was archived is listed once, as its current hot copy
+        recrawled = dict(tenders[len(tenders) // 2], tenderName='Archive Tender recrawled')
+        with signal_app.TenderWriter(seen_at=NOW) as writer:
+            writer.add(recrawled)
+        recrawled_date = submitted[str(recrawled['tenderId'])]
+        around = signal_app.query_tender_history(recrawled_date, recrawled_date + timedelta(seconds=1))
+        check(results, "Re-crawled archived tenders are not listed twice",
+              [row['name'] for row in around] == ['Archive Tender recrawled']
+              and signal_app.count_tender_history(start) == len(paged))
+
+    # Retention: three months later the oldest partitions fall past the horizon and are dropped
+    later = signal_app.add_months(NOW, 3)
+    later_horizon = signal_app.add_months(signal_app.month_start(later), -signal_app.TENDER_ARCHIVE_RETENTION_MONTHS)
+    signal_app.maintain_tender_archive(later)
+    with signal_app.app.app_context():
+        remaining = signal_app.TenderArchivePartition.query.all()
+        dropped = [partition for partition in partitions if partition.ends_at <= later_horizon]
+        tables = set(signal_app.db.inspect(signal_app.db.engine).get_table_names())
+        check(results, "Expired partitions are dropped",
+              bool(dropped) and all(partition.starts_at >= later_horizon for partition in remaining)
+              and not any(partition.table_name in tables for partition in dropped),
+              f"{len(dropped)} partitions")
+        check(results, "History lookup skips dropped months",
+              not signal_app.query_tender_history(horizon, later_horizon))
+
+    print("=" * 50)
+    print(f"⏱️  Maintenance: {maintenance_elapsed:.2f}s ({summary})")
+    return all(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check tender archiving, compaction, retention and history lookups")
+    parser.add_argument('--tenders', type=int, default=3000)
+    parser.add_argument('--page-size', type=int, default=200)
+    parser.add_argument('--database-uri', help="Database to use (default: a temporary SQLite file)")
+    check_args = parser.parse_args()
+
+    print("🧪 Checking the tender archive...")
+    print("=" * 50)
+
+    success = run_archive_check(check_args)
+
+    print("=" * 50)
+    if success:
+        print("✅ Tender archive check completed - archive, compaction, retention and lookups agree")
+    else:
+        print("❌ Tender archive check found mismatches")